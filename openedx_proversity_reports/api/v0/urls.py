@@ -30,4 +30,9 @@ urlpatterns = [
         views.UserActivityCompletionView.as_view(),
         name='user-activity-completion-data',
     ),
+    url(
+        r'^change-feed$',
+        views.ChangeFeedView.as_view(),
+        name='change-feed',
+    ),
 ]
@@ -6,6 +6,7 @@ import logging
 
 from celery.result import AsyncResult
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse, Http404
 from django.contrib.auth.models import User
 from rest_framework import permissions, status
@@ -21,9 +22,16 @@ from openedx_proversity_reports.edxapp_wrapper.get_openedx_permissions import ge
 from openedx_proversity_reports.edxapp_wrapper.get_student_account_library import \
     get_user_salesforce_contact_id
 from openedx_proversity_reports.reports.activity_completion_report import GenerateCompletionReport
-from openedx_proversity_reports.serializers import SalesforceContactIdSerializer, ActivityCompletionReportSerializer
+from openedx_proversity_reports.reports.change_feed import InvalidCursorError, get_change_feed_page
+from openedx_proversity_reports.serializers import (
+    ActivityCompletionReportSerializer,
+    ChangeFeedSerializer,
+    SalesforceContactIdSerializer,
+)
 from openedx_proversity_reports.utils import (
+    decode_report_result,
     get_attribute_from_module,
+    get_chunks,
     get_exisiting_users_by_email,
     get_user_course_enrollments,
 )
@@ -147,7 +155,7 @@ class GetReportView(APIView):
         }
 
         if task.successful():
-            response_data['data']['result'] = task.result
+            response_data['data']['result'] = decode_report_result(task.result)
         elif task.failed():
             logger.info(
                 "The task with id = %s has been finalized with the following error %s.",
@@ -185,7 +193,9 @@ class SalesforceContactId(APIView):
         This method creates a new record in the UserSalesforceContactId model
         for the given Salesforce contact id and user id.
 
-        It's possible to create multiple records in the same request.
+        It's possible to create multiple records in the same request. The users are validated
+        and the missing records are created in bulk, skipping the records that already exist.
+        If a concurrent request creates some of the records, the chunk is created record by record.
 
         **Params**
 
@@ -220,20 +230,57 @@ class SalesforceContactId(APIView):
 
         salesforce_model = get_user_salesforce_contact_id()
         operation_errors = []
+        existing_user_ids = set()
+        existing_contact_ids = set()
+        new_contact_ids = []
+
+        for user_ids in get_chunks(set(record.get('user_id') for record in serialized_data.data)):
+            existing_user_ids.update(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+        for user_ids in get_chunks(existing_user_ids):
+            existing_contact_ids.update(salesforce_model.objects.filter(
+                user_id__in=user_ids,
+                contact_id_source=self.DEFAULT_CONTACT_ID_SOURCE,
+            ).values_list('user_id', 'contact_id'))
 
         for record in serialized_data.data:
-            try:
-                user = User.objects.get(id=record.get('user_id'))
-            except User.DoesNotExist:
-                message = 'User with id: {} does not exists, skipped.'.format(record.get('user_id'))
+            user_id = record.get('user_id')
+            contact_id = record.get('contact_id', '')
+
+            if user_id not in existing_user_ids:
+                message = 'User with id: {} does not exists, skipped.'.format(user_id)
                 operation_errors.append(message)
                 continue
 
-            salesforce_model.objects.get_or_create(
-                user=user,
-                contact_id=record.get('contact_id', ''),
+            if (user_id, contact_id) in existing_contact_ids:
+                continue
+
+            existing_contact_ids.add((user_id, contact_id))
+            new_contact_ids.append(salesforce_model(
+                user_id=user_id,
+                contact_id=contact_id,
                 contact_id_source=self.DEFAULT_CONTACT_ID_SOURCE,
-            )
+            ))
+
+        for new_contact_ids_chunk in get_chunks(new_contact_ids):
+            try:
+                with transaction.atomic():
+                    salesforce_model.objects.bulk_create(new_contact_ids_chunk)
+            except IntegrityError:
+                # A concurrent request created some of the records, create the missing ones one by one.
+                for salesforce_contact_id in new_contact_ids_chunk:
+                    try:
+                        with transaction.atomic():
+                            salesforce_model.objects.get_or_create(
+                                user_id=salesforce_contact_id.user_id,
+                                contact_id=salesforce_contact_id.contact_id,
+                                contact_id_source=salesforce_contact_id.contact_id_source,
+                            )
+                    except IntegrityError:
+                        message = 'Contact id for user with id: {} conflicts with an existing record, skipped.'.format(
+                            salesforce_contact_id.user_id,
+                        )
+                        operation_errors.append(message)
 
         if operation_errors:
             json_response = dict(
@@ -344,3 +391,72 @@ class UserActivityCompletionView(APIView):
         }
 
         return JsonResponse(json_response, status=status.HTTP_200_OK)
+
+
+class ChangeFeedView(APIView):
+    """
+    This class returns the enrollment and last login changes using a cursor.
+    """
+
+    authentication_classes = (
+        OAuth2Authentication,
+        get_jwt_authentication(),
+    )
+    permission_classes = (permissions.IsAuthenticated, get_staff_or_owner())
+
+    def get(self, request):
+        """
+        Return a page of the enrollment creations, enrollment mode or active state changes
+        and last login updates ordered by date.
+
+        **Params**
+            cursor: The next_cursor value of the previous page. **Optional**,
+                the feed starts from the beginning if it's not provided.
+            page_size: Max number of changes in the page. **Optional**
+            course_ids: Course id to filter the changes, it may be repeated. **Optional**
+        **Example Requests**:
+            GET /proversity-reports/api/v0/change-feed?course_ids=course-v1:edX+DemoX+Demo_Course&cursor=<cursor>
+        **Response Values**:
+            * results: List of changes.
+            * next_cursor: Cursor to request the next page, it must be stored to continue tailing the feed.
+            * has_more: True if there are more changes available.
+
+            **Example**
+            {
+                "results": [
+                    {
+                        "type": "enrollment",
+                        "change": "updated",
+                        "date": "2019-01-01T10:00:00+00:00",
+                        "user_id": 10,
+                        "username": "audit",
+                        "course_id": "course-v1:edX+DemoX+Demo_Course",
+                        "mode": "verified",
+                        "is_active": true
+                    },
+                    {
+                        "type": "last_login",
+                        "date": "2019-01-01T10:05:00+00:00",
+                        "user_id": 10,
+                        "username": "audit",
+                        "email": "audit@example.com"
+                    }
+                ],
+                "next_cursor": "eyJlbnJvbGxtZW50Ijog...",
+                "has_more": false
+            }
+        """
+        serialized_data = ChangeFeedSerializer(data=request.GET)
+
+        serialized_data.is_valid(raise_exception=True)
+
+        try:
+            feed_page = get_change_feed_page(
+                course_keys=serialized_data.data.get('course_keys', []),
+                cursor=serialized_data.validated_data.get('cursor'),
+                page_size=serialized_data.validated_data.get('page_size'),
+            )
+        except InvalidCursorError as error:
+            raise ValidationError(detail={'cursor': error.message})
+
+        return JsonResponse(feed_page, status=status.HTTP_200_OK)
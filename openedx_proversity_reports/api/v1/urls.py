@@ -20,4 +20,14 @@ urlpatterns = [
         views.GetReportView.as_view(),
         name='get-report-data',
     ),
+    url(
+        r'^get-report-data-batch$',
+        views.GetReportDataBatchView.as_view(),
+        name='get-report-data-batch',
+    ),
+    url(
+        r'^get-report-job$',
+        views.GetReportJobView.as_view(),
+        name='get-report-job',
+    ),
 ]
@@ -4,9 +4,11 @@ This file contains the views for openedx-proversity-reports API V1.
 import json
 import logging
 
-from celery.result import AsyncResult
+from celery.result import AsyncResult, GroupResult
+from celery.states import EXCEPTION_STATES, FAILURE, PENDING, STARTED, SUCCESS
 from django.conf import settings
-from django.http import Http404, JsonResponse
+from django.core.cache import cache
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
@@ -17,8 +19,10 @@ from openedx_proversity_reports.edxapp_wrapper.get_edx_rest_framework_extensions
     get_jwt_authentication
 from openedx_proversity_reports.edxapp_wrapper.get_openedx_permissions import \
     get_staff_or_owner
-from openedx_proversity_reports.serializers import GenerateReportViewSerializer
+from openedx_proversity_reports.reports.backend.base import REPORT_JOB_CACHE_KEY
+from openedx_proversity_reports.serializers import GenerateReportViewSerializer, ReportTasksBatchSerializer
 from openedx_proversity_reports.utils import (
+    decode_report_result,
     get_attribute_from_module,
     get_report_backend,
 )
@@ -107,7 +111,7 @@ class GetReportView(APIView):
         }
 
         if task.successful():
-            response_data['data']['result'] = task.result
+            response_data['data']['result'] = decode_report_result(task.result)
         elif task.failed():
             logger.info(
                 "The task with id = %s has been finalized with the following error %s.",
@@ -127,3 +131,285 @@ class GetReportView(APIView):
             response_data['data']['result'] = None
 
         return JsonResponse(**response_data)
+
+
+class GetReportDataBatchView(APIView):
+    """
+    This class returns the status and the result of several tasks in a single request.
+    """
+
+    authentication_classes = (
+        OAuth2Authentication,
+        get_jwt_authentication(),
+    )
+    permission_classes = (permissions.IsAuthenticated, get_staff_or_owner())
+
+    def post(self, request):
+        """
+        Return the status of the given tasks and the result of the finished ones.
+
+        The task states are read from the result backend with a single multi-get
+        when the backend supports it.
+
+        **Params**
+            task_ids: List of task ids, limited by OPR_REPORT_BATCH_MAX_TASK_IDS.
+        **Example Requests**:
+            POST /proversity-reports/api/v1/get-report-data-batch
+        **Response Values**:
+            results: Dict with the status and the result of every task by task id.
+        **Example Response**:
+            {
+                "results": {
+                    "<celery-uuid>": {
+                        "status": "SUCCESS",
+                        "result": {...}
+                    },
+                    "<celery-uuid>": {
+                        "status": "PENDING",
+                        "result": null
+                    }
+                }
+            }
+        """
+        serialized_data = ReportTasksBatchSerializer(data=request.data)
+
+        serialized_data.is_valid(raise_exception=True)
+
+        task_metas = get_task_metas(serialized_data.validated_data.get('task_ids', []))
+
+        return JsonResponse(
+            {'results': {task_id: get_task_response_data(meta) for task_id, meta in task_metas.items()}},
+            status=status.HTTP_200_OK,
+        )
+
+
+def get_task_metas(task_ids):
+    """
+    Return the status and the result of the given tasks.
+
+    The task metas are read with a single multi-get when the result backend is a key value store,
+    otherwise every task is read on its own.
+
+    Args:
+        task_ids: List of task ids.
+    Returns:
+        Dict containing the task meta by task id: {'status': ..., 'result': ...}
+    """
+    task_ids = list(set(task_ids))
+    task_metas = {}
+
+    if not task_ids:
+        return task_metas
+
+    result_backend = AsyncResult(id=task_ids[0]).backend
+
+    if hasattr(result_backend, 'mget') and hasattr(result_backend, 'get_key_for_task'):
+        keys = [result_backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = result_backend.mget(keys)
+
+        # Some key value stores return a dict by key instead of a list in the keys order.
+        if hasattr(values, 'get'):
+            values = [values.get(key) for key in keys]
+
+        for task_id, value in zip(task_ids, values):
+            if value is not None:
+                task_metas[task_id] = result_backend.decode_result(value)
+    else:
+        logger.warning(
+            'The result backend %s does not support multi-get, reading %s task results one by one.',
+            type(result_backend).__name__,
+            len(task_ids),
+        )
+
+        for task_id in task_ids:
+            task = AsyncResult(id=task_id)
+            task_metas[task_id] = {'status': task.status, 'result': task.result}
+
+    for task_id in task_ids:
+        task_metas.setdefault(task_id, {'status': PENDING, 'result': None})
+
+        if task_metas[task_id].get('status') in EXCEPTION_STATES and \
+                not isinstance(task_metas[task_id].get('result'), Exception):
+            task_metas[task_id]['result'] = result_backend.exception_to_python(task_metas[task_id].get('result'))
+
+    return task_metas
+
+
+def get_task_response_data(task_meta):
+    """
+    Return the response data of a task as it's returned by GetReportView.
+
+    Args:
+        task_meta: Dict with the status and the result of the task.
+    Returns:
+        Dict: {
+            status: Task status.
+            result: Task result if the task finished successfully, otherwise the error data or None.
+        }
+    """
+    task_status = task_meta.get('status', PENDING)
+    task_result = task_meta.get('result')
+    response_data = {
+        'status': task_status,
+        'result': None,
+    }
+
+    if task_status == SUCCESS:
+        response_data['result'] = decode_report_result(task_result)
+    elif task_status == FAILURE:
+        try:
+            response_data = json.loads(task_result.message).get('data', response_data)
+        except (AttributeError, TypeError, ValueError):
+            pass
+
+    return response_data
+
+
+class GetReportJobView(APIView):
+    """
+    This class returns the progress and the result of all the pages of a report.
+    """
+
+    authentication_classes = (
+        OAuth2Authentication,
+        get_jwt_authentication(),
+    )
+    permission_classes = (permissions.IsAuthenticated, get_staff_or_owner())
+
+    def get(self, request):
+        """
+        Return the aggregate status of the page tasks of the report job.
+
+        The page states are read with a single multi-get of the task metas. Once all the pages
+        have finished successfully, the page results are streamed in the order of the pages
+        and concatenated by course.
+
+        **Params**
+            job_id: The report job id returned by the generate report endpoint.
+        **Example Requests**:
+            GET /proversity-reports/api/v1/get-report-job?job_id=<celery-uuid>
+        **Response Values**:
+            status: Aggregate status of the job. PENDING, STARTED, SUCCESS or FAILURE.
+            total_pages: Number of page tasks.
+            completed_pages: Number of page tasks that have finished successfully.
+            failed_pages: Number of page tasks that have failed.
+            result: Dict containing the concatenated data of the pages by course id,
+                    only when the status is SUCCESS.
+            pages: List with the other values returned by every page, e.g. the site
+                   of the enrollment per site report, only when the status is SUCCESS.
+        **Example Response**:
+            {
+                "status": "SUCCESS",
+                "total_pages": 2,
+                "completed_pages": 2,
+                "failed_pages": 0,
+                "result": {
+                    "course-v1:edX+DemoX+Demo_Course": [...]
+                },
+                "pages": [
+                    {"course_key": "course-v1:edX+DemoX+Demo_Course", "site": "...", "registered_users": 10},
+                    ...
+                ]
+            }
+        """
+        job_id = request.GET.get('job_id')
+
+        if not job_id:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        report_job = GroupResult.restore(job_id)
+
+        if report_job is None:
+            raise Http404
+
+        results = report_job.results
+        page_statuses = [
+            task_meta.get('status') for task_meta in get_task_metas([page.id for page in results]).values()
+        ]
+        failed_pages = page_statuses.count(FAILURE)
+        completed_pages = page_statuses.count(SUCCESS)
+        job_data = {
+            'total_pages': len(results),
+            'completed_pages': completed_pages,
+            'failed_pages': failed_pages,
+        }
+
+        if failed_pages:
+            job_status = FAILURE
+        elif completed_pages == len(results):
+            job_status = SUCCESS
+        elif completed_pages:
+            job_status = STARTED
+        else:
+            job_status = PENDING
+
+        job_data['status'] = job_status
+
+        if job_status != SUCCESS:
+            job_data['result'] = None
+            return JsonResponse(job_data, status=status.HTTP_200_OK)
+
+        return StreamingHttpResponse(
+            iter_report_job_response(
+                job_data,
+                results,
+                cache.get(REPORT_JOB_CACHE_KEY.format(job_id)),
+            ),
+            content_type='application/json',
+            status=status.HTTP_200_OK,
+        )
+
+
+def iter_report_job_response(job_data, results, job_course_ids=None):
+    """
+    Yield the JSON response of a finished report job.
+
+    The page results are fetched and serialized one by one, so the whole report
+    is never held in memory. The values of every page other than its data are
+    kept in the pages list.
+
+    Args:
+        job_data: Dict with the aggregate status of the job.
+        results: List of celery.result.AsyncResult of the page tasks, in page order.
+        job_course_ids: List with the course id of every page task. If it's not available,
+                        the course is read from the page result.
+    Yields:
+        JSON strings.
+    """
+    yield json.dumps(job_data)[:-1]
+    yield ', "result": {'
+
+    current_course_id = None
+    has_items = False
+    pages_metadata = []
+
+    for index, page in enumerate(results):
+        page_result = decode_report_result(page.result) or {}
+        pages_metadata.append({key: value for key, value in page_result.items() if key != 'data'})
+
+        if job_course_ids and index < len(job_course_ids):
+            course_id = job_course_ids[index]
+        else:
+            course_id = page_result.get('course_key', '')
+
+        if course_id != current_course_id:
+            if current_course_id is not None:
+                yield '], '
+
+            yield '{}: ['.format(json.dumps(course_id))
+            current_course_id = course_id
+            has_items = False
+
+        page_data = page_result.get('data', [])
+
+        if not isinstance(page_data, list):
+            page_data = [page_data]
+
+        for item in page_data:
+            yield '{}{}'.format(', ' if has_items else '', json.dumps(item))
+            has_items = True
+
+    if current_course_id is not None:
+        yield ']'
+
+    yield '}}, "pages": {}}}'.format(json.dumps(pages_metadata))
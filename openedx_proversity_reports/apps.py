@@ -31,7 +31,9 @@ class OpenEdxProversityReportsConfig(AppConfig):
 
     def ready(self):
         """
-        The line below allows tasks defined in this app to be included by celery workers.
+        The lines below allow tasks defined in this app to be included by celery workers
+        and connect the signal handlers of the app.
         https://docs.djangoproject.com/en/1.8/ref/applications/#methods
         """
         from .tasks import *  # pylint: disable=unused-variable, wildcard-import
+        from . import signals  # pylint: disable=unused-variable
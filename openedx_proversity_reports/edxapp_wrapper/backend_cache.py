@@ -0,0 +1,32 @@
+""" Backend modules resolution. """
+from importlib import import_module
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+BACKEND_SETTINGS_PREFIX = 'OPR_'
+_BACKENDS = {}
+
+
+def get_backend(setting_name):
+    """
+    Return the backend module configured in the given setting.
+
+    The module is imported once and cached by setting name, so the
+    accessors don't hit the import machinery on every call.
+    """
+    try:
+        return _BACKENDS[setting_name]
+    except KeyError:
+        backend = import_module(getattr(settings, setting_name))
+        _BACKENDS[setting_name] = backend
+
+        return backend
+
+
+@receiver(setting_changed)
+def clear_backend_cache(sender, setting, **kwargs):  # pylint: disable=unused-argument
+    """ Drop the cached backend when its setting is changed, e.g. by override_settings. """
+    if setting.startswith(BACKEND_SETTINGS_PREFIX):
+        _BACKENDS.pop(setting, None)
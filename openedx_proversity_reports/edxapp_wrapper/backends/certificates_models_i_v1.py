@@ -1,2 +1,16 @@
 """ Backend abstraction. """
-from lms.djangoapps.certificates.models import CertificateStatuses, certificate_status_for_student  # pylint: disable=unused-import
+from lms.djangoapps.certificates.models import (  # pylint: disable=unused-import
+    CertificateStatuses,
+    GeneratedCertificate,
+    certificate_status_for_student,
+)
+
+
+def course_certificate_statuses(course_key, user_ids=None):
+    """ Returns the certificate status of every user in the course, or only of the given user ids, by user id. """
+    generated_certificates = GeneratedCertificate.objects.filter(course_id=course_key)
+
+    if user_ids is not None:
+        generated_certificates = generated_certificates.filter(user_id__in=user_ids)
+
+    return dict(generated_certificates.values_list('user_id', 'status'))
@@ -1,3 +1,7 @@
 """ Backend abstraction. """
 from lms.djangoapps.grades.context import grading_context
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory  # pylint: disable=unused-import
+from lms.djangoapps.grades.models import (  # pylint: disable=unused-import
+    PersistentCourseGrade,
+    PersistentSubsectionGrade,
+)
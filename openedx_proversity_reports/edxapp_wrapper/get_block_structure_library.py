@@ -1,12 +1,10 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_course_in_cache(*args, **kwargs):
     """ Retuns the block structure for the given course id. """
 
-    backend_function = settings.OPR_BLOCK_STRUCTURE_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_BLOCK_STRUCTURE_LIBRARY')
 
     return backend.get_course_in_cache(*args, **kwargs)
@@ -1,13 +1,11 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_certificate_statuses(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get CertificateStatuses class. """
 
-    backend_function = settings.OPR_CERTIFICATES_MODELS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_CERTIFICATES_MODELS')
 
     return backend.CertificateStatuses
 
@@ -15,7 +13,14 @@ def get_certificate_statuses(*args, **kwargs):  # pylint: disable=unused-argumen
 def get_certificate_status_for_student(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get certificate_status_for_student method. """
 
-    backend_function = settings.OPR_CERTIFICATES_MODELS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_CERTIFICATES_MODELS')
 
     return backend.certificate_status_for_student(*args, **kwargs)
+
+
+def get_course_certificate_statuses(*args, **kwargs):  # pylint: disable=unused-argument
+    """ Get the certificate statuses of all the users in a course. """
+
+    backend = get_backend('OPR_CERTIFICATES_MODELS')
+
+    return backend.course_certificate_statuses(*args, **kwargs)
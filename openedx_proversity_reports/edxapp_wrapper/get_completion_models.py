@@ -1,12 +1,10 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_block_completion_model(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get BlockCompletion Class. """
 
-    backend_function = settings.OPR_COMPLETION_MODELS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COMPLETION_MODELS')
 
     return backend.BlockCompletion
@@ -1,12 +1,10 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_course_cohort(*args, **kwargs):
     """ Get course cohorts """
 
-    backend_function = settings.OPR_COURSE_COHORT
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSE_COHORT')
 
     return backend.get_course_cohort_backend(*args, **kwargs)
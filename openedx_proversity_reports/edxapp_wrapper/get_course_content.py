@@ -1,12 +1,10 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def course_overview():
     """ Get the Course Overview model. """
 
-    backend_function = settings.OPR_COURSE_CONTENT
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSE_CONTENT')
 
     return backend.CourseOverview
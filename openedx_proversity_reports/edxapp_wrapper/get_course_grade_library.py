@@ -1,13 +1,11 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_course_grade_factory(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get CourseGradeFactory Class. """
 
-    backend_function = settings.OPR_COURSE_GRADE_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSE_GRADE_LIBRARY')
 
     return backend.CourseGradeFactory()
 
@@ -15,7 +13,22 @@ def get_course_grade_factory(*args, **kwargs):  # pylint: disable=unused-argumen
 def get_grading_context(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get grading_context method. """
 
-    backend_function = settings.OPR_COURSE_GRADE_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSE_GRADE_LIBRARY')
 
     return backend.grading_context(*args, **kwargs)
+
+
+def get_persistent_course_grade_model(*args, **kwargs):  # pylint: disable=unused-argument
+    """ Get PersistentCourseGrade Class. """
+
+    backend = get_backend('OPR_COURSE_GRADE_LIBRARY')
+
+    return backend.PersistentCourseGrade
+
+
+def get_persistent_subsection_grade_model(*args, **kwargs):  # pylint: disable=unused-argument
+    """ Get PersistentSubsectionGrade Class. """
+
+    backend = get_backend('OPR_COURSE_GRADE_LIBRARY')
+
+    return backend.PersistentSubsectionGrade
@@ -1,12 +1,10 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_course_teams(*args, **kwargs):
     """ Get course teams """
 
-    backend_function = settings.OPR_COURSE_TEAMS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSE_TEAMS')
 
     return backend.get_course_teams_backend(*args, **kwargs)
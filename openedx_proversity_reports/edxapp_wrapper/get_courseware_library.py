@@ -1,13 +1,11 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_course_by_id(*args, **kwargs):
     """ Get the course for the given course id. """
 
-    backend_function = settings.OPR_COURSEWARE_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSEWARE_LIBRARY')
 
     return backend.get_course_by_id(*args, **kwargs)
 
@@ -15,7 +13,6 @@ def get_course_by_id(*args, **kwargs):
 def student_module():
     """ Get StudentModule model. """
 
-    backend_function = settings.OPR_COURSEWARE_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_COURSEWARE_LIBRARY')
 
     return backend.StudentModule
@@ -1,12 +1,10 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_jwt_authentication(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get JwtAuthentication Class """
 
-    backend_function = settings.OPR_EDX_REST_FRAMEWORK_EXTENSIONS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_EDX_REST_FRAMEWORK_EXTENSIONS')
 
     return backend.JwtAuthentication
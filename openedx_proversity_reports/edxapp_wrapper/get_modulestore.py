@@ -1,20 +1,17 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_modulestore(*args, **kwargs):
     """ Get modulestore """
 
-    backend_function = settings.OPR_MODULESTORE
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_MODULESTORE')
 
     return backend.get_modulestore_backend(*args, **kwargs)
 
 def item_not_found_error():
     """ Get the ItemNotFoundError exception. """
 
-    backend_function = settings.OPR_MODULESTORE
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_MODULESTORE')
 
     return backend.get_item_not_found_error()
@@ -1,12 +1,10 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_staff_or_owner(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get IsStaffOrOwner Class """
 
-    backend_function = settings.OPR_OPENEDX_PERMISSIONS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_OPENEDX_PERMISSIONS')
 
     return backend.IsStaffOrOwner
@@ -1,12 +1,10 @@
 """ Backend abstraction. """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_user_salesforce_contact_id():
     """ Get UserSalesforceContactId model. """
 
-    backend_function = settings.OPR_STUDENT_ACCOUNT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_ACCOUNT_LIBRARY')
 
     return backend.user_salesforce_contact_id()
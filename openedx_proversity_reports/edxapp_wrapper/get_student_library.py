@@ -1,13 +1,11 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def user_has_role(*args, **kwargs):
     """ Get user_has_role method. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.user_has_role_backend(*args, **kwargs)
 
@@ -15,8 +13,7 @@ def user_has_role(*args, **kwargs):
 def get_course_staff_role(*args, **kwargs):
     """ Get staff role. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.course_staff_role_backend(*args, **kwargs)
 
@@ -24,8 +21,7 @@ def get_course_staff_role(*args, **kwargs):
 def course_access_role():
     """ Get CourseAccessRole model. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.course_access_role()
 
@@ -33,8 +29,7 @@ def course_access_role():
 def get_user_profile():
     """ Get UserProfile model. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.user_profile()
 
@@ -42,8 +37,7 @@ def get_user_profile():
 def get_user(*args, **kwargs):
     """ Returns the get_user method. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.get_user_helper(*args, **kwargs)
 
@@ -51,8 +45,7 @@ def get_user(*args, **kwargs):
 def get_course_enrollment():
     """ Get CourseEnrollment model. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.course_enrollment()
 
@@ -60,8 +53,7 @@ def get_course_enrollment():
 def user_readonly_serializer(*args, **kwargs):
     """ Get UserReadOnlySerializer. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.get_user_readonly_serializer(*args, **kwargs)
 
@@ -69,8 +61,7 @@ def user_readonly_serializer(*args, **kwargs):
 def user_attribute():
     """ Get the UserAttribute model. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.get_user_attribute()
 
@@ -78,7 +69,6 @@ def user_attribute():
 def user_signup_source():
     """ Get the UserSignupSource model. """
 
-    backend_function = settings.OPR_STUDENT_LIBRARY
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_STUDENT_LIBRARY')
 
     return backend.get_user_signup_source()
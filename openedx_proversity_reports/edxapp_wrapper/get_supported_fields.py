@@ -1,12 +1,10 @@
 """ Backend abstraction """
-from importlib import import_module
-from django.conf import settings
+from openedx_proversity_reports.edxapp_wrapper.backend_cache import get_backend
 
 
 def get_supported_fields(*args, **kwargs):  # pylint: disable=unused-argument
     """ Get SUPPORTED FIELDS """
 
-    backend_function = settings.OPR_SUPPORTED_FIELDS
-    backend = import_module(backend_function)
+    backend = get_backend('OPR_SUPPORTED_FIELDS')
 
     return backend.SUPPORTED_FIELDS
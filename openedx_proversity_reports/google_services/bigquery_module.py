@@ -9,6 +9,8 @@ from google.cloud import bigquery
 from google.cloud.bigquery.client import Client
 from google.oauth2 import service_account
 
+from openedx_proversity_reports.google_services.rate_limit import GOOGLE_BIGQUERY_BUCKET, call_with_rate_limit
+
 BIGQUERY_API_SCOPES = (
     'https://www.googleapis.com/auth/bigquery',
     'https://www.googleapis.com/auth/cloud-platform',
@@ -25,25 +27,51 @@ def get_google_bigquery_data(query_string):
     Return:
         google.cloud.bigquery.job.QueryJob.result() instance.
     """
-    bigquery_client = get_google_bigquery_api_client()
-    query_job = bigquery_client.query(
+    return get_google_bigquery_query_rows(
+        get_google_bigquery_api_client(),
         query_string,
-        job_config=get_google_bigquery_job_config(),
+        get_google_bigquery_job_config(),
     )
 
+
+def get_google_bigquery_query_rows(bigquery_client, query_string, job_config):
+    """
+    Return the rows of the given query or an empty list if the query job fails.
+
+    The job is submitted and waited for in every attempt of call_with_rate_limit, so the jobs
+    that fail by rate limits, quotas or server errors are resubmitted with backoff.
+    The errors are only logged when the retries run out.
+
+    Args:
+        bigquery_client: google.cloud.bigquery.client.Client instance.
+        query_string: The query string.
+        job_config: google.cloud.bigquery.job.QueryJobConfig instance.
+    Returns:
+        google.cloud.bigquery.job.QueryJob.result() instance or empty list.
+    """
     try:
-        query_job.exception()
+        return call_with_rate_limit(
+            GOOGLE_BIGQUERY_BUCKET,
+            run_google_bigquery_query,
+            bigquery_client,
+            query_string,
+            job_config,
+        )
     except GoogleAPIError as api_error:
-        for error_item in api_error.errors:
+        for error_item in getattr(api_error, 'errors', None) or [{'message': str(api_error)}]:
             logger.error('Google BigQuery API error: %s', error_item.get('message', ''))
-            return []
 
-    if query_job.errors:
-        for error_item in query_job.errors:
-            logger.error('Google BigQuery query error: %s', error_item.get('message', ''))
-            return []
+        return []
+
 
-    return query_job.result()
+def run_google_bigquery_query(bigquery_client, query_string, job_config):
+    """
+    Submit the query job and wait for its result.
+
+    Raises:
+        google.api_core.exceptions.GoogleAPIError: If the job could not be submitted or it failed.
+    """
+    return bigquery_client.query(query_string, job_config=job_config).result()
 
 
 def get_google_bigquery_api_client():
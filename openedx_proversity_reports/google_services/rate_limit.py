@@ -0,0 +1,173 @@
+"""
+This module contains the rate limiter shared by the Google API calls.
+
+Every bucket is a token bucket that allows a configured number of requests per period.
+The bucket is stored in the django cache, so the limit is shared by all the workers.
+"""
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GOOGLE_ANALYTICS_BUCKET = 'google_analytics'
+GOOGLE_BIGQUERY_BUCKET = 'google_bigquery'
+RATE_LIMIT_CACHE_KEY = 'openedx-proversity-reports-google-api-rate-limit-{}-{}'
+RATE_LIMIT_CACHE_ATTEMPTS = 3
+RETRYABLE_STATUS_CODE = 429
+FORBIDDEN_STATUS_CODE = 403
+RETRYABLE_FORBIDDEN_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded'}
+logger = logging.getLogger(__name__)
+
+
+def call_with_rate_limit(bucket_name, function, *args, **kwargs):
+    """
+    Call the given function when the bucket allows a new request.
+
+    The call is retried with jittered exponential backoff when the API responds
+    with a 429, a rate limit or quota 403 or a 5xx error, up to OPR_GOOGLE_API_MAX_RETRIES times.
+
+    Args:
+        bucket_name: Name of the rate limit bucket in OPR_GOOGLE_API_RATE_LIMITS.
+        function: Function that makes the API request.
+    Returns:
+        The function result.
+    """
+    max_retries = getattr(settings, 'OPR_GOOGLE_API_MAX_RETRIES', 5)
+    backoff_base = getattr(settings, 'OPR_GOOGLE_API_BACKOFF_BASE', 1)
+    backoff_max = getattr(settings, 'OPR_GOOGLE_API_BACKOFF_MAX', 60)
+    attempt = 0
+
+    while True:
+        acquire_rate_limit_token(bucket_name)
+
+        try:
+            return function(*args, **kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            if attempt >= max_retries or not is_retryable_error(error):
+                raise
+
+            backoff = random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+            attempt += 1
+            logger.warning(
+                'Google API %s request failed with %s, retrying in %.2f seconds.',
+                bucket_name,
+                get_error_status_code(error),
+                backoff,
+            )
+            time.sleep(backoff)
+
+
+def acquire_rate_limit_token(bucket_name):
+    """
+    Wait until the bucket allows a new request.
+
+    The bucket is a token bucket with a capacity of the configured number of requests,
+    refilled at requests / period tokens per second. It's stored in the django cache as
+    the bucket start time and a counter of the consumed tokens, so every worker takes its
+    token with an atomic incr. The tokens available at a given time are
+    capacity + elapsed time * refill rate - consumed tokens, and when the bucket is full
+    the consumed counter is moved forward, so the idle time never adds more than
+    the capacity to the bucket.
+
+    If there are no tokens available, the token is reserved anyway and the call waits
+    until it's refilled.
+
+    Args:
+        bucket_name: Name of the rate limit bucket in OPR_GOOGLE_API_RATE_LIMITS.
+    """
+    rate_limit = getattr(settings, 'OPR_GOOGLE_API_RATE_LIMITS', {}).get(bucket_name)
+
+    if not rate_limit:
+        return
+
+    capacity = rate_limit.get('requests', 0)
+    period = rate_limit.get('period', 1)
+
+    if capacity <= 0 or period <= 0:
+        return
+
+    refill_rate = float(capacity) / period
+
+    for _ in range(RATE_LIMIT_CACHE_ATTEMPTS):
+        cache.add(RATE_LIMIT_CACHE_KEY.format(bucket_name, 'start'), time.time(), None)
+        start_time = cache.get(RATE_LIMIT_CACHE_KEY.format(bucket_name, 'start'))
+
+        if start_time is None:
+            continue
+
+        # The counter is bound to the start time, so a new counter is used if the start time is evicted.
+        consumed_cache_key = RATE_LIMIT_CACHE_KEY.format(bucket_name, 'consumed-{}'.format(start_time))
+        cache.add(consumed_cache_key, 0, None)
+
+        try:
+            refilled_tokens = capacity + (time.time() - start_time) * refill_rate
+            unused_tokens = int(refilled_tokens - cache.get(consumed_cache_key, 0) - capacity)
+
+            if unused_tokens > 0:
+                # The bucket is full, so the tokens refilled while idle are discarded.
+                cache.incr(consumed_cache_key, unused_tokens)
+
+            consumed_tokens = cache.incr(consumed_cache_key)
+        except ValueError:
+            # The counter was evicted between add and incr.
+            continue
+
+        wait_time = (consumed_tokens - refilled_tokens) / refill_rate
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return
+
+    logger.warning('The Google API %s rate limit bucket could not be stored in the cache.', bucket_name)
+
+
+def is_retryable_error(error):
+    """
+    Return True if the error is a rate limit, a quota or a server error.
+
+    The Google APIs respond to some rate limit and quota errors with a 403 status,
+    so those are identified by the reason of the error.
+    """
+    status_code = get_error_status_code(error)
+
+    if status_code == FORBIDDEN_STATUS_CODE:
+        return bool(RETRYABLE_FORBIDDEN_REASONS & set(get_error_reasons(error)))
+
+    return status_code == RETRYABLE_STATUS_CODE or 500 <= status_code < 600
+
+
+def get_error_reasons(error):
+    """
+    Return the reasons of a Google API client error.
+
+    The Google Cloud client errors have the error items in errors,
+    the Google API client errors have them in the JSON content of the response.
+    """
+    error_items = getattr(error, 'errors', None)
+
+    if not isinstance(error_items, list):
+        try:
+            error_items = json.loads(getattr(error, 'content', None) or '{}').get('error', {}).get('errors', [])
+        except (AttributeError, TypeError, ValueError):
+            error_items = []
+
+    return [error_item.get('reason') for error_item in error_items if isinstance(error_item, dict)]
+
+
+def get_error_status_code(error):
+    """
+    Return the HTTP status code of a Google API client error or 0 if it's not available.
+
+    The Google API client errors have the status in resp.status,
+    the Google Cloud client errors have it in code.
+    """
+    status_code = getattr(getattr(error, 'resp', None), 'status', None) or getattr(error, 'code', None)
+
+    try:
+        return int(status_code)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,86 @@
+"""
+Management command to populate the LearnerCompletionSummary model from the block completions.
+"""
+from django.db.models import Max
+from django.core.management.base import BaseCommand
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from openedx_proversity_reports.edxapp_wrapper.get_completion_models import get_block_completion_model
+from openedx_proversity_reports.models import LearnerCompletionSummary
+from openedx_proversity_reports.utils import update_learner_completion_summaries
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the completion summaries of the learners from the BlockCompletion records.
+
+    The summaries of every processed course are replaced. With --incremental only the summaries
+    of the learners with block completions modified after the latest summarized completion
+    of the course are rebuilt, e.g. to catch up the summaries after the workers were stopped.
+    The summaries are otherwise updated by a deferred task after every block completion save.
+
+    Example:
+        ./manage.py lms backfill_learner_completion_summary --course-ids course-v1:edX+DemoX+Demo_Course
+        ./manage.py lms backfill_learner_completion_summary --incremental
+    """
+    help = 'Populate the learner completion summaries from the block completions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-ids',
+            nargs='+',
+            default=[],
+            help='Course ids to process. All the courses with block completions are processed by default.',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=False,
+            help='Only update the summaries of the learners with new block completions.',
+        )
+
+    def handle(self, *args, **options):
+        block_completion_objects = get_block_completion_model().objects
+
+        if options['course_ids']:
+            course_keys = []
+
+            for course_id in options['course_ids']:
+                try:
+                    course_keys.append(CourseKey.from_string(course_id))
+                except InvalidKeyError:
+                    self.stderr.write('Invalid course id: {}, skipped.'.format(course_id))
+        else:
+            course_keys = block_completion_objects.order_by().values_list('course_key', flat=True).distinct()
+
+        for course_key in course_keys:
+            user_ids = None
+
+            if options['incremental']:
+                latest_completion = get_latest_summarized_completion(course_key)
+
+                if latest_completion:
+                    user_ids = list(block_completion_objects.filter(
+                        course_key=course_key,
+                        modified__gt=latest_completion,
+                    ).order_by().values_list('user_id', flat=True).distinct())
+
+            self.stdout.write('{}: {} learner completion summaries were created.'.format(
+                course_key,
+                update_learner_completion_summaries(course_key, user_ids),
+            ))
+
+
+def get_latest_summarized_completion(course_key):
+    """
+    Return the date of the latest block completion included in the summaries of the course.
+
+    Args:
+        course_key: opaque_keys.edx.keys.CourseKey instance.
+    Returns:
+        Datetime or None if the course has no summaries.
+    """
+    return LearnerCompletionSummary.objects.filter(
+        course_key=course_key,
+    ).aggregate(latest_completion=Max('latest_completion')).get('latest_completion')
@@ -0,0 +1,72 @@
+"""
+Management command to populate the UserSessionMetrics model from the user profile meta.
+"""
+from django.core.management.base import BaseCommand
+
+from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_user_profile
+from openedx_proversity_reports.middleware import parse_session_meta
+from openedx_proversity_reports.models import UserSessionMetrics
+from openedx_proversity_reports.serializers import UserSessionSerializer
+from openedx_proversity_reports.utils import get_chunks
+
+
+class Command(BaseCommand):
+    """
+    Create the session metrics of the users from the session data stored in their profile meta.
+
+    Users that already have session metrics are skipped, except the ones that only have
+    their last login date, which are updated.
+
+    Example:
+        ./manage.py lms backfill_user_session_metrics --chunk-size 1000
+    """
+    help = 'Populate the session metrics table from the session data stored in the user profile meta.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Number of profiles processed per query. Defaults to OPR_QUERY_CHUNK_SIZE.',
+        )
+
+    def handle(self, *args, **options):
+        user_profiles = get_user_profile().objects.filter(
+            meta__contains='session_number',
+        ).values_list('user_id', 'meta', 'user__last_login')
+        created_count = 0
+        updated_count = 0
+
+        for user_profiles_chunk in get_chunks(user_profiles.iterator(), options['chunk_size']):
+            existing_session_numbers = dict(UserSessionMetrics.objects.filter(
+                user_id__in=[user_id for user_id, _, _ in user_profiles_chunk],
+            ).values_list('user_id', 'session_number'))
+            session_metrics = []
+
+            for user_id, meta, last_login in user_profiles_chunk:
+                if existing_session_numbers.get(user_id):
+                    continue
+
+                serializer = UserSessionSerializer(data=parse_session_meta(meta))
+
+                if not serializer.is_valid():
+                    continue
+
+                if user_id in existing_session_numbers:
+                    # The row was created with the last login date only.
+                    UserSessionMetrics.objects.filter(user_id=user_id).update(**serializer.validated_data)
+                    updated_count += 1
+                else:
+                    session_metrics.append(UserSessionMetrics(
+                        user_id=user_id,
+                        last_login=last_login,
+                        **serializer.validated_data
+                    ))
+
+            UserSessionMetrics.objects.bulk_create(session_metrics)
+            created_count += len(session_metrics)
+
+        self.stdout.write('{} user session metrics were created and {} were updated.'.format(
+            created_count,
+            updated_count,
+        ))
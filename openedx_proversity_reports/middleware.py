@@ -2,22 +2,32 @@
 Middlewares for openedx-proversity-reports.
 """
 import json
+import time
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_user_profile
+from openedx_proversity_reports.models import UserSessionMetrics
 from openedx_proversity_reports.serializers import UserSessionSerializer
 
 
 class UserSessionMiddleware(object):
     """
     Middleware to store session data.
+
+    The session data is buffered in the django cache and it's only written to the UserSessionMetrics
+    model when a new session starts or after OPR_SESSION_DATA_FLUSH_INTERVAL seconds since the last write.
     """
     AVG_SESSION_LABEL = 'avg_session'
     LAST_SESSION_LABEL = 'last_session'
     LENGTH_CURRENT_SESSION_LABEL = 'length_current_session'
     SESSION_NUMBER_LABEL = 'session_number'
     TIME_BETWEEN_SESSIONS_LABEL = 'time_between_sessions'
+    CACHE_KEY = 'openedx-proversity-reports-user-session-{}'
+    CACHE_TIMEOUT = 86400  # This value is in seconds.
+    LAST_FLUSH_LABEL = 'last_flush'
+    SESSION_DATA_LABEL = 'session_data'
 
     def process_request(self, request):
         """
@@ -27,28 +37,23 @@ class UserSessionMiddleware(object):
         """
         user = request.user
 
-        if user.is_anonymous():
+        if user.is_anonymous() or self.is_excluded_path(request.path):
             return None
 
-        user_profile = get_user_profile().objects.get(user_id=user.id)
-
-        try:
-            meta_as_dict = json.loads(user_profile.meta)
-            serializer = UserSessionSerializer(data=meta_as_dict)
-            session_data = serializer.validated_data if serializer.is_valid() else {}
-        except ValueError:
-            session_data = {}
-            meta_as_dict = {'previous_data': user_profile.meta}
+        buffered_data = cache.get(self.CACHE_KEY.format(user.id)) or self.get_stored_session_data(user)
+        serializer = UserSessionSerializer(data=buffered_data.get(self.SESSION_DATA_LABEL, {}))
+        session_data = serializer.validated_data if serializer.is_valid() else {}
 
         if not session_data:
-            user_profile.meta = self.get_meta_session_data(
-                previous_data=meta_as_dict,
+            self.update_session_data(
+                user,
+                buffered_data,
+                flush=True,
                 avg_session=0,
                 length_current_session=0,
                 time_between_sessions=0,
                 session_number=1,
             )
-            user_profile.save()
             return None
 
         last_session = session_data.get(self.LAST_SESSION_LABEL, datetime.now())
@@ -57,6 +62,7 @@ class UserSessionMiddleware(object):
         time_between_sessions = session_data.get(self.TIME_BETWEEN_SESSIONS_LABEL, 0)
         session_number = session_data.get(self.SESSION_NUMBER_LABEL, 0)
         delta_time = datetime.now(last_session.tzinfo) - last_session
+        new_session = False
 
         if delta_time > timedelta(minutes=settings.OPR_TIME_BETWEEN_SESSIONS) and length_current_session:
             avg_session = self.calculate_average_value(avg_session, session_number, length_current_session)
@@ -67,64 +73,98 @@ class UserSessionMiddleware(object):
             )
             length_current_session = 0
             session_number += 1
+            new_session = True
         elif delta_time < timedelta(minutes=settings.OPR_TIME_BETWEEN_SESSIONS):
             length_current_session = delta_time + timedelta(minutes=length_current_session)
             length_current_session = length_current_session.total_seconds() / 60
 
-        user_profile.meta = self.get_meta_session_data(
-            meta_as_dict,
-            avg_session,
-            length_current_session,
-            time_between_sessions,
-            session_number,
+        flush_interval = getattr(settings, 'OPR_SESSION_DATA_FLUSH_INTERVAL', 0)
+        last_flush = buffered_data.get(self.LAST_FLUSH_LABEL, 0)
+
+        self.update_session_data(
+            user,
+            buffered_data,
+            flush=new_session or time.time() - last_flush >= flush_interval,
+            avg_session=avg_session,
+            length_current_session=length_current_session,
+            time_between_sessions=time_between_sessions,
+            session_number=session_number,
         )
 
-        user_profile.save()
-
         return None
 
-    def get_meta_session_data(
-        self,
-        previous_data,
-        avg_session,
-        length_current_session,
-        time_between_sessions,
-        session_number,
-    ):
+    def is_excluded_path(self, path):
+        """
+        Return True if the request path starts with any of the OPR_SESSION_EXCLUDED_PATH_PREFIXES.
+        """
+        excluded_path_prefixes = tuple(getattr(settings, 'OPR_SESSION_EXCLUDED_PATH_PREFIXES', []))
+
+        return bool(excluded_path_prefixes) and path.startswith(excluded_path_prefixes)
+
+    def get_stored_session_data(self, user):
         """
-        Return a dict as string for the given arguments.
+        Return the buffered session data from the stored session metrics of the user.
+
+        If the user doesn't have session metrics yet, or only has the row created to store
+        the last login date (session_number is 0), the session data stored by previous
+        versions of this middleware in the user profile meta is used.
+
         Args:
-            previous_data: Dict.
-            avg_session: Float.
-            length_current_session: Float.
-            time_between_sessions. Float.
-            session_number: Int.
+            user: User Model.
         Returns:
-            String:
-            **Example:
-                {
-                    "last_session": "2019-07-31 13:03:22.270898",
-                    "session_number": "1",
-                    "time_between_sessions": "0.0",
-                    "avg_session": "0.0",
-                    "length_current_session": "0.782830416667",
-                    ...
-                    ...
-                    ...
-                }
+            Dict: {
+                session_data: Dict containing the session fields.
+                last_flush: Timestamp of the last time the session data was written to the database.
+            }
+        """
+        session_metrics = UserSessionMetrics.objects.filter(user_id=user.id, session_number__gt=0).first()
+
+        if session_metrics:
+            session_data = UserSessionSerializer(session_metrics).data
+        else:
+            user_profile = get_user_profile().objects.filter(user_id=user.id).only('meta').first()
+            session_data = parse_session_meta(getattr(user_profile, 'meta', None))
+
+        return {
+            self.SESSION_DATA_LABEL: session_data,
+            self.LAST_FLUSH_LABEL: time.time(),
+        }
+
+    def update_session_data(self, user, buffered_data, flush, **session_values):
+        """
+        Store the given session values in the cache and write them to the session metrics if flush is True.
+
+        Args:
+            user: User Model.
+            buffered_data: Dict containing the current buffered session data.
+            flush: Boolean, True to write the session values to the session metrics.
+            session_values: avg_session, length_current_session, time_between_sessions and session_number.
         """
         serializer = UserSessionSerializer(data={
             self.LAST_SESSION_LABEL: datetime.now(),
-            self.AVG_SESSION_LABEL: avg_session,
-            self.LENGTH_CURRENT_SESSION_LABEL: length_current_session,
-            self.TIME_BETWEEN_SESSIONS_LABEL: time_between_sessions,
-            self.SESSION_NUMBER_LABEL: session_number,
+            self.AVG_SESSION_LABEL: session_values.get('avg_session', 0),
+            self.LENGTH_CURRENT_SESSION_LABEL: session_values.get('length_current_session', 0),
+            self.TIME_BETWEEN_SESSIONS_LABEL: session_values.get('time_between_sessions', 0),
+            self.SESSION_NUMBER_LABEL: session_values.get('session_number', 0),
         })
 
-        if serializer.is_valid():
-            previous_data.update(serializer.data)
+        if not serializer.is_valid():
+            return
+
+        last_flush = buffered_data.get(self.LAST_FLUSH_LABEL, 0)
 
-        return json.dumps(previous_data)
+        if flush:
+            UserSessionMetrics.upsert(user.id, **serializer.validated_data)
+            last_flush = time.time()
+
+        cache.set(
+            self.CACHE_KEY.format(user.id),
+            {
+                self.SESSION_DATA_LABEL: serializer.data,
+                self.LAST_FLUSH_LABEL: last_flush,
+            },
+            self.CACHE_TIMEOUT,
+        )
 
     def calculate_average_value(self, previous_avg, data_number, new_data):
         """
@@ -140,6 +180,26 @@ class UserSessionMiddleware(object):
             new_data: (Float) Value for the last data.
 
         Returns:
-            Float: Average value.
+            Float: Average value, or new_data if there is no previous data.
         """
+        if data_number <= 0:
+            return new_data
+
         return ((previous_avg * (data_number - 1)) + new_data) / data_number
+
+
+def parse_session_meta(meta):
+    """
+    Return the session data stored by previous versions of the UserSessionMiddleware in a user profile meta.
+
+    Args:
+        meta: User profile meta JSON string.
+    Returns:
+        Dict containing the meta fields or an empty dict.
+    """
+    try:
+        meta_as_dict = json.loads(meta)
+    except (TypeError, ValueError):
+        return {}
+
+    return meta_as_dict if isinstance(meta_as_dict, dict) else {}
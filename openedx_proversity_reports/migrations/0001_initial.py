@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSessionMetrics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_session', models.DateTimeField(db_index=True)),
+                ('avg_session', models.FloatField(default=0)),
+                ('length_current_session', models.FloatField(default=0)),
+                ('time_between_sessions', models.FloatField(default=0)),
+                ('session_number', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='proversity_session_metrics', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('openedx_proversity_reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearnerCompletionSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_key', opaque_keys.edx.django.models.CourseKeyField(db_index=True, max_length=255)),
+                ('latest_block_key', opaque_keys.edx.django.models.UsageKeyField(blank=True, max_length=255, null=True)),
+                ('latest_completion', models.DateTimeField(blank=True, null=True)),
+                ('completed_blocks', models.TextField(default='{}')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('modified', models.DateTimeField(auto_now=True, db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proversity_completion_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='learnercompletionsummary',
+            unique_together=set([('user', 'course_key')]),
+        ),
+    ]
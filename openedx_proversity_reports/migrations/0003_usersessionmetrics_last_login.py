@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+CHUNK_SIZE = 1000
+
+
+def copy_users_last_login(apps, schema_editor):
+    """
+    Copy the last login date of the users to their session metrics.
+
+    The users that have logged in but don't have session metrics get a new row,
+    so all of them are included in the last login change feed.
+    """
+    user_session_metrics = apps.get_model('openedx_proversity_reports', 'UserSessionMetrics')
+    user_model = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    user_session_metrics.objects.update(
+        last_login=Subquery(user_model.objects.filter(id=OuterRef('user_id')).values('last_login')[:1]),
+    )
+
+    users = user_model.objects.filter(
+        last_login__isnull=False,
+    ).exclude(
+        id__in=user_session_metrics.objects.values('user_id'),
+    ).values_list('id', 'last_login').order_by('id')
+    new_session_metrics = []
+
+    for user_id, last_login in users.iterator():
+        new_session_metrics.append(user_session_metrics(
+            user_id=user_id,
+            last_session=last_login,
+            last_login=last_login,
+        ))
+
+        if len(new_session_metrics) >= CHUNK_SIZE:
+            user_session_metrics.objects.bulk_create(new_session_metrics)
+            new_session_metrics = []
+
+    user_session_metrics.objects.bulk_create(new_session_metrics)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('openedx_proversity_reports', '0002_learnercompletionsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersessionmetrics',
+            name='last_login',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='usersessionmetrics',
+            index_together=set([('last_login', 'id')]),
+        ),
+        migrations.RunPython(copy_users_last_login, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_proversity_reports', '0003_usersessionmetrics_last_login'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='learnercompletionsummary',
+            name='completed_blocks',
+        ),
+        migrations.RemoveField(
+            model_name='learnercompletionsummary',
+            name='version',
+        ),
+    ]
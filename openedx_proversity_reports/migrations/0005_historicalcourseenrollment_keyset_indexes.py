@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+HISTORICAL_COURSE_ENROLLMENT_TABLE = 'student_historicalcourseenrollment'
+# Indexes of the enrollment change feed keyset queries, with and without the course filter.
+HISTORICAL_COURSE_ENROLLMENT_INDEXES = (
+    ('opr_histenroll_date_id', ('history_date', 'history_id')),
+    ('opr_histenroll_course_date_id', ('course_id', 'history_date', 'history_id')),
+)
+
+
+def get_historical_course_enrollment_table(schema_editor):
+    """
+    Return the enrollment history table name or None if the platform doesn't track the enrollment history.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        table_names = schema_editor.connection.introspection.table_names(cursor)
+
+    return HISTORICAL_COURSE_ENROLLMENT_TABLE if HISTORICAL_COURSE_ENROLLMENT_TABLE in table_names else None
+
+
+def create_historical_course_enrollment_indexes(apps, schema_editor):
+    """
+    Create the indexes of the enrollment change feed in the enrollment history table.
+    """
+    table_name = get_historical_course_enrollment_table(schema_editor)
+
+    if not table_name:
+        return
+
+    for index_name, columns in HISTORICAL_COURSE_ENROLLMENT_INDEXES:
+        schema_editor.execute(schema_editor.sql_create_index % {
+            'name': schema_editor.quote_name(index_name),
+            'table': schema_editor.quote_name(table_name),
+            'columns': ', '.join(schema_editor.quote_name(column) for column in columns),
+            'extra': '',
+        })
+
+
+def delete_historical_course_enrollment_indexes(apps, schema_editor):
+    """
+    Delete the indexes of the enrollment change feed from the enrollment history table.
+    """
+    table_name = get_historical_course_enrollment_table(schema_editor)
+
+    if not table_name:
+        return
+
+    for index_name, _ in HISTORICAL_COURSE_ENROLLMENT_INDEXES:
+        schema_editor.execute(schema_editor.sql_delete_index % {
+            'name': schema_editor.quote_name(index_name),
+            'table': schema_editor.quote_name(table_name),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedx_proversity_reports', '0004_remove_learnercompletionsummary_unused_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_historical_course_enrollment_indexes, delete_historical_course_enrollment_indexes),
+    ]
@@ -0,0 +1,91 @@
+"""
+Models for openedx-proversity-reports.
+"""
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from opaque_keys.edx.django.models import CourseKeyField, UsageKeyField
+
+
+class UserSessionMetrics(models.Model):
+    """
+    Session metrics of a user, calculated by the UserSessionMiddleware.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        related_name='proversity_session_metrics',
+        on_delete=models.CASCADE,
+    )
+    last_session = models.DateTimeField(db_index=True)
+    avg_session = models.FloatField(default=0)
+    length_current_session = models.FloatField(default=0)
+    time_between_sessions = models.FloatField(default=0)
+    session_number = models.PositiveIntegerField(default=0)
+    last_login = models.DateTimeField(null=True, blank=True)
+
+    class Meta(object):
+        index_together = [('last_login', 'id')]
+
+    def __unicode__(self):
+        return u'Session metrics of the user {}'.format(self.user_id)
+
+    @classmethod
+    def upsert(cls, user_id, **metrics):
+        """
+        Update the session metrics of the given user or create them if they don't exist.
+
+        The row is written with a single UPDATE statement, so concurrent requests
+        never overwrite columns that were not provided.
+
+        Args:
+            user_id: Id of the user.
+            metrics: Values of the session metrics fields.
+        """
+        if cls.objects.filter(user_id=user_id).update(**metrics):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, **dict({'last_session': timezone.now()}, **metrics))
+        except IntegrityError:
+            cls.objects.filter(user_id=user_id).update(**metrics)
+
+    @classmethod
+    def update_last_login(cls, user_id, last_login):
+        """
+        Store the last login date of the given user.
+
+        The last login is copied from the user, so the change feed can read
+        the last login updates through the (last_login, id) index.
+
+        Args:
+            user_id: Id of the user.
+            last_login: Datetime of the login.
+        """
+        cls.upsert(user_id, last_login=last_login)
+
+
+class LearnerCompletionSummary(models.Model):
+    """
+    Summary of the block completions of a user in a course.
+
+    The summaries are built by the backfill_learner_completion_summary command and updated
+    by a deferred task after the block completions of the learner are saved, so the reports
+    can read the latest completion of all the learners of a course with a single query.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='proversity_completion_summaries',
+        on_delete=models.CASCADE,
+    )
+    course_key = CourseKeyField(max_length=255, db_index=True)
+    latest_block_key = UsageKeyField(max_length=255, null=True, blank=True)
+    latest_completion = models.DateTimeField(null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta(object):
+        unique_together = ('user', 'course_key')
+
+    def __unicode__(self):
+        return u'Completion summary of the user {} in {}'.format(self.user_id, self.course_key)
+
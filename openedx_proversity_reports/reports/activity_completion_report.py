@@ -8,9 +8,8 @@ from django.core.exceptions import ObjectDoesNotExist
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import BlockUsageLocator
 
-from openedx_proversity_reports.utils import get_required_activity_dict
+from openedx_proversity_reports.utils import get_required_activity_dict, get_users_completions
 from openedx_proversity_reports.edxapp_wrapper.get_block_structure_library import get_course_in_cache
-from openedx_proversity_reports.edxapp_wrapper.get_completion_models import get_block_completion_model
 from openedx_proversity_reports.edxapp_wrapper.get_courseware_library import get_course_by_id
 from openedx_proversity_reports.edxapp_wrapper.get_modulestore import (
     get_modulestore,
@@ -87,11 +86,12 @@ class GenerateCompletionReport(object):
         """
         activity_completion_data = []
         required_ids = self.required_block_ids
+        users_completions, _ = get_users_completions(self.users, self.course_key)
 
         for user in self.users:
             user, user_profile = get_user(user.email)
             first_name, last_name = get_first_and_last_name(user_profile.name)
-            completed_activities = self.get_completed_activities(user)
+            completed_activities = users_completions.get(user.id, {})
             last_login = user.last_login
             display_last_login = None
 
@@ -146,13 +146,6 @@ class GenerateCompletionReport(object):
         return activity_completion_data
 
 
-    def get_completed_activities(self, user):
-        """
-        Returns blocks that have been completed by the user.
-        """
-        return get_block_completion_model().get_course_completions(user, self.course_key)
-
-
     def get_course_required_block_ids(self, required_block_ids):
         """
         Filters the required_block_ids list, and returns
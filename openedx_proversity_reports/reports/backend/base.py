@@ -1,8 +1,9 @@
 """
 Module that contains the report backend base class.
 """
-from celery import task
+from celery import group, task
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -11,6 +12,8 @@ from openedx_proversity_reports.edxapp_wrapper.get_student_library import (
 )
 from openedx_proversity_reports.utils import get_enrolled_users
 
+REPORT_JOB_CACHE_KEY = 'openedx-proversity-reports-report-job-{}'
+
 
 class BaseReportBackend(object):
     """
@@ -31,20 +34,22 @@ class BaseReportBackend(object):
         Process the report generation request.
         Manage the report pagination by the enrolled users.
 
+        The page tasks of all the courses are submitted as a single celery group,
+        whose id is the report job id used to request the status of the whole report.
+
         Args:
             request: django.http.request.HttpRequest object.
             extra_data: Dict that contains additional data.
         Returns:
             BaseReportBackend.process_response object.
         """
-        get_report_data_url = request.build_absolute_uri(reverse('proversity-reports:api:v1:get-report-data'))
-        course_report_pages = {}
+        report_page_tasks = []
+        job_course_ids = []
 
         for course_key in self.course_keys:
             enrolled_users_pages = self.get_pages_from_enrolled_users(
                 enrolled_users=get_enrolled_users(course_key, self.include_staff_users),
             )
-            report_pages = []
 
             for enrolled_users_page in enrolled_users_pages:
                 user_serializer = user_readonly_serializer(
@@ -53,19 +58,48 @@ class BaseReportBackend(object):
                     context={'request': request},
                 )
                 serialized_enrollments = [user_serializer.to_representation(user) for user in enrolled_users_page]
-                report_task = self.generate_report_data_task.delay(
+                report_page_tasks.append(self.generate_report_data_task.s(
                     extra_data=extra_data,
                     course_key=unicode(course_key),
                     enrolled_users=self.clean_serialized_enrollment_data(serialized_enrollments),
-                )
+                ))
+                job_course_ids.append(str(course_key))
+
+        report_job = group(report_page_tasks).apply_async()
+        report_job.save()
+        cache.set(
+            REPORT_JOB_CACHE_KEY.format(report_job.id),
+            job_course_ids,
+            getattr(settings, 'OPR_REPORT_JOB_CACHE_TIMEOUT', 86400),
+        )
 
-                report_pages.append('{}?task_id={}'.format(get_report_data_url, report_task.id))
+        return self.process_response(
+            report_pages=self.get_report_pages(request, report_job, job_course_ids),
+            report_job=report_job,
+            job_url='{}?job_id={}'.format(
+                request.build_absolute_uri(reverse('proversity-reports:api:v1:get-report-job')),
+                report_job.id,
+            ),
+        )
 
-            course_report_pages.update({
-                str(course_key): report_pages,
-            })
+    def get_report_pages(self, request, report_job, job_course_ids):
+        """
+        Return the status url of every page task by course.
 
-        return self.process_response(report_pages=course_report_pages)
+        Args:
+            request: django.http.request.HttpRequest object.
+            report_job: celery.result.GroupResult of the page tasks.
+            job_course_ids: List with the course id of every page task.
+        Returns:
+            Dict containing the list of page urls by course id.
+        """
+        get_report_data_url = request.build_absolute_uri(reverse('proversity-reports:api:v1:get-report-data'))
+        course_report_pages = {str(course_key): [] for course_key in self.course_keys}
+
+        for course_id, report_task in zip(job_course_ids, report_job.results):
+            course_report_pages[course_id].append('{}?task_id={}'.format(get_report_data_url, report_task.id))
+
+        return course_report_pages
 
     def process_response(self, *args, **kwargs):
         """
@@ -73,15 +107,23 @@ class BaseReportBackend(object):
 
         Kwargs:
             report_pages: Dict that contains the pages of the report.
+            report_job: celery.result.GroupResult of the page tasks.
+            job_url: Url of the status of the whole report.
         Return:
             Dict: {
                 data: Contains the course pages for the report.
+                job_id: Id of the report job.
+                job_url: This url provides the progress and the ordered result of all the pages.
                 success: Indicates a successful request.
                 status: HTTP status code.
             }
         """
+        report_job = kwargs.pop('report_job', None)
+
         return {
             'data': kwargs.pop('report_pages', {}),
+            'job_id': report_job.id if report_job else None,
+            'job_url': kwargs.pop('job_url', None),
             'success': True,
             'status': status.HTTP_202_ACCEPTED,
         }
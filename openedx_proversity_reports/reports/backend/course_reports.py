@@ -0,0 +1,135 @@
+"""
+Paged report backends for the course reports.
+
+Every backend splits the enrolled learners of the course into pages and every page
+is generated by its own task, so the pages are computed in parallel by the workers.
+"""
+from datetime import datetime
+from importlib import import_module
+
+from rest_framework import status
+
+from openedx_proversity_reports.reports.backend.base import BaseReportBackend
+from openedx_proversity_reports.serializers import (
+    ActivityCompletionReportSerializer,
+    LearningTrackerReportSerializer,
+)
+
+SUPPORTED_TASKS_MODULE = 'openedx_proversity_reports.tasks'
+
+
+class CourseReportBackend(BaseReportBackend):
+    """
+    Base class of the course report backends.
+
+    The page tasks only receive the username of the learners, which is enough to fetch
+    the users of the page with a single query.
+    """
+    report_task_name = None
+
+    def __init__(self, *args, **kwargs):  # pylint: disable=unused-argument
+        # Import the task module directly to avoid circular import.
+        super(CourseReportBackend, self).__init__(
+            generate_report_data_task=getattr(
+                import_module(SUPPORTED_TASKS_MODULE),
+                self.report_task_name,
+                None,
+            ),
+            user_serializer_fields=['username'],
+            *args,
+            **kwargs
+        )
+
+
+class CompletionReportBackend(CourseReportBackend):
+    """
+    Completion report backend class.
+    """
+    report_task_name = 'completion_report_task'
+
+
+class LearningTrackerReportBackend(CourseReportBackend):
+    """
+    Learning tracker report backend class.
+    """
+    report_task_name = 'learning_tracker_report_task'
+
+    def process_request(self, request, extra_data={}):  # pylint: disable=dangerous-default-value
+        """
+        Validate the learning tracker report parameters before starting the page tasks.
+
+        Args:
+            request: django.http.request.HttpRequest object.
+            extra_data: Dict that contains additional data.
+        Returns:
+            BaseReportBackend.process_response object.
+            HTTP_400_BAD_REQUEST object.
+        """
+        serialized_data = LearningTrackerReportSerializer(data=extra_data)
+
+        if not serialized_data.is_valid():
+            return {
+                'errors': serialized_data.errors,
+                'success': False,
+                'status': status.HTTP_400_BAD_REQUEST,
+            }
+
+        return super(LearningTrackerReportBackend, self).process_request(request, extra_data)
+
+
+class TimeSpentPerUserReportBackend(CourseReportBackend):
+    """
+    Time spent per user report backend class.
+    """
+    report_task_name = 'time_spent_per_user_report_task'
+
+    def process_request(self, request, extra_data={}):  # pylint: disable=dangerous-default-value
+        """
+        Validate the query date before starting the page tasks.
+
+        Args:
+            request: django.http.request.HttpRequest object.
+            extra_data: Dict that contains additional data.
+        Returns:
+            BaseReportBackend.process_response object.
+            HTTP_400_BAD_REQUEST object.
+        """
+        try:
+            datetime.strptime(extra_data.get('date', ''), '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return {
+                'date': 'date field was not provided or has an invalid format.',
+                'success': False,
+                'status': status.HTTP_400_BAD_REQUEST,
+            }
+
+        return super(TimeSpentPerUserReportBackend, self).process_request(request, extra_data)
+
+
+class ActivityCompletionReportBackend(CourseReportBackend):
+    """
+    Activity completion report backend class.
+    """
+    report_task_name = 'activity_completion_report_task'
+
+    def process_request(self, request, extra_data={}):  # pylint: disable=dangerous-default-value
+        """
+        Validate the activity completion parameters before starting the page tasks.
+
+        Args:
+            request: django.http.request.HttpRequest object.
+            extra_data: Dict that contains additional data.
+        Returns:
+            BaseReportBackend.process_response object.
+            HTTP_400_BAD_REQUEST object.
+        """
+        serialized_data = ActivityCompletionReportSerializer(data=extra_data)
+
+        if not serialized_data.is_valid():
+            return {
+                'errors': serialized_data.errors,
+                'success': False,
+                'status': status.HTTP_400_BAD_REQUEST,
+            }
+
+        return super(ActivityCompletionReportBackend, self).process_request(request, extra_data)
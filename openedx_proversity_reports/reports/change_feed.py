@@ -0,0 +1,246 @@
+"""
+Enrollment and last login change feed.
+
+The feed merges two streams ordered by (date, id):
+
+    * enrollment: The enrollment history rows, so creations and mode or active state changes are included.
+    * last_login: The users whose last login date has been updated, read from their session metrics.
+
+The position of every stream is kept in an opaque cursor, so every page is fetched
+with keyset queries instead of offsets.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_course_enrollment
+from openedx_proversity_reports.models import UserSessionMetrics
+
+ENROLLMENT_STREAM = 'enrollment'
+LAST_LOGIN_STREAM = 'last_login'
+ENROLLMENT_CHANGE_TYPES = {
+    '+': 'created',
+    '~': 'updated',
+    '-': 'deleted',
+}
+
+
+class InvalidCursorError(Exception):
+    """
+    Raised when the change feed cursor can not be decoded.
+    """
+    pass
+
+
+def encode_cursor(positions):
+    """
+    Return the opaque cursor for the given stream positions.
+
+    Args:
+        positions: Dict containing the last (date, id) tuple consumed from every stream.
+    Returns:
+        Url safe base64 string.
+    """
+    return base64.urlsafe_b64encode(json.dumps({
+        stream: [position[0].isoformat(), position[1]] for stream, position in positions.items()
+    }))
+
+
+def decode_cursor(cursor):
+    """
+    Return the stream positions of the given cursor.
+
+    Args:
+        cursor: Url safe base64 string returned by encode_cursor.
+    Returns:
+        Dict containing the last (date, id) tuple consumed from every stream.
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    positions = {}
+
+    if not cursor:
+        return positions
+
+    try:
+        cursor_data = json.loads(base64.urlsafe_b64decode(str(cursor)))
+
+        for stream in (ENROLLMENT_STREAM, LAST_LOGIN_STREAM):
+            if stream not in cursor_data:
+                continue
+
+            date, position_id = cursor_data[stream]
+            date = parse_datetime(date)
+
+            if date is None:
+                raise ValueError
+
+            positions[stream] = (date, int(position_id))
+    except (TypeError, ValueError, AttributeError):
+        raise InvalidCursorError('Invalid cursor value.')
+
+    return positions
+
+
+def get_keyset_filter(date_field, id_field, position):
+    """
+    Return the filter of the rows after the given (date, id) position.
+
+    The date lower bound is included on its own, so the database can use the (date, id)
+    index range instead of evaluating the disjunction for every row.
+    """
+    date, position_id = position
+
+    return Q(**{'{}__gte'.format(date_field): date}) & (
+        Q(**{'{}__gt'.format(date_field): date}) | Q(**{'{}__gt'.format(id_field): position_id})
+    )
+
+
+def get_enrollment_changes(course_keys, position, limit):
+    """
+    Return the enrollment changes after the given position.
+
+    The changes are read from the enrollment history table, using the (history_date, history_id)
+    indexes added by the 0005 migration. If the model is not tracked only the enrollment
+    creations are returned.
+
+    Args:
+        course_keys: List of opaque_keys.edx.keys.CourseKey instances, empty for all the courses.
+        position: Last (date, id) tuple consumed or None.
+        limit: Max number of changes.
+    Returns:
+        List of (date, id, change data) tuples.
+    """
+    course_enrollment_model = get_course_enrollment()
+    history = getattr(course_enrollment_model, 'history', None)
+
+    if history is not None:
+        date_field, id_field, change_type_field = 'history_date', 'history_id', 'history_type'
+        enrollments = history.all()
+    else:
+        date_field, id_field, change_type_field = 'created', 'id', None
+        enrollments = course_enrollment_model.objects.all()
+
+    if course_keys:
+        enrollments = enrollments.filter(course_id__in=course_keys)
+
+    if position:
+        enrollments = enrollments.filter(get_keyset_filter(date_field, id_field, position))
+
+    fields = [date_field, id_field, 'course_id', 'user_id', 'user__username', 'mode', 'is_active']
+
+    if change_type_field:
+        fields.append(change_type_field)
+
+    enrollments = enrollments.order_by(date_field, id_field).values_list(*fields)[:limit]
+    changes = []
+
+    for enrollment in enrollments:
+        date, change_id, course_id, user_id, username, mode, is_active = enrollment[:7]
+        change_type = enrollment[7] if change_type_field else '+'
+
+        changes.append((date, change_id, {
+            'type': ENROLLMENT_STREAM,
+            'change': ENROLLMENT_CHANGE_TYPES.get(change_type, 'updated'),
+            'date': date.isoformat(),
+            'user_id': user_id,
+            'username': username,
+            'course_id': unicode(course_id),
+            'mode': mode,
+            'is_active': is_active,
+        }))
+
+    return changes
+
+
+def get_last_login_changes(course_keys, position, limit):
+    """
+    Return the last login updates after the given position.
+
+    The last login dates are read from the session metrics, which are indexed by (last_login, id).
+
+    Args:
+        course_keys: List of opaque_keys.edx.keys.CourseKey instances, empty for all the courses.
+        position: Last (date, id) tuple consumed or None.
+        limit: Max number of changes.
+    Returns:
+        List of (date, id, change data) tuples.
+    """
+    session_metrics = UserSessionMetrics.objects.filter(last_login__isnull=False)
+
+    if course_keys:
+        session_metrics = session_metrics.filter(
+            user_id__in=get_course_enrollment().objects.filter(
+                course_id__in=course_keys,
+            ).values('user_id'),
+        )
+
+    if position:
+        session_metrics = session_metrics.filter(get_keyset_filter('last_login', 'id', position))
+
+    session_metrics = session_metrics.order_by('last_login', 'id').values_list(
+        'last_login',
+        'id',
+        'user_id',
+        'user__username',
+        'user__email',
+    )[:limit]
+
+    return [
+        (last_login, session_metrics_id, {
+            'type': LAST_LOGIN_STREAM,
+            'date': last_login.isoformat(),
+            'user_id': user_id,
+            'username': username,
+            'email': email,
+        }) for last_login, session_metrics_id, user_id, username, email in session_metrics
+    ]
+
+
+def get_change_feed_page(course_keys, cursor, page_size):
+    """
+    Return a page of the enrollment and last login change feed.
+
+    Every stream is queried for one page after its position in the cursor,
+    the changes are merged by date and the stream positions are moved
+    only up to the changes included in the page.
+
+    Args:
+        course_keys: List of opaque_keys.edx.keys.CourseKey instances, empty for all the courses.
+        cursor: Cursor returned by the previous page or None to start from the beginning.
+        page_size: Max number of changes in the page.
+    Returns:
+        Dict: {
+            results: List of changes ordered by date.
+            next_cursor: Cursor to request the next page.
+            has_more: True if there are more changes after this page.
+        }
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    positions = decode_cursor(cursor)
+    changes = []
+
+    streams = (
+        (ENROLLMENT_STREAM, get_enrollment_changes),
+        (LAST_LOGIN_STREAM, get_last_login_changes),
+    )
+
+    for stream, get_changes in streams:
+        changes.extend(
+            (date, stream, change_id, change_data)
+            for date, change_id, change_data in get_changes(course_keys, positions.get(stream), page_size + 1)
+        )
+
+    changes.sort(key=lambda change: change[:3])
+
+    for date, stream, change_id, _ in changes[:page_size]:
+        positions[stream] = (date, change_id)
+
+    return {
+        'results': [change[3] for change in changes[:page_size]],
+        'next_cursor': encode_cursor(positions) if positions else cursor,
+        'has_more': len(changes) > page_size,
+    }
@@ -2,7 +2,11 @@
 Enrollment Report Class.
 """
 import logging
+from datetime import datetime, time, timedelta
 
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 
@@ -10,10 +14,8 @@ from openedx_proversity_reports.serializers import EnrollmentReportSerializer
 from openedx_proversity_reports.edxapp_wrapper.get_course_details import get_course_details
 from openedx_proversity_reports.edxapp_wrapper.get_student_account_library import \
     get_user_salesforce_contact_id
-from openedx_proversity_reports.edxapp_wrapper.get_student_library import (
-    get_course_enrollment,
-    get_user_profile,
-)
+from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_course_enrollment
+from openedx_proversity_reports.utils import get_chunks, get_normalized_course_id
 
 LOG = logging.getLogger(__name__)
 
@@ -34,48 +36,67 @@ class EnrollmentReport(object):
         """
         Returns a List with the enrollments for the given dates.
         """
-        course_details = get_course_details().fetch(self.course_key)
-        course_start_intake_of_intent = '{} {}'.format(
-            course_details.start_date.strftime('%B'),
-            course_details.start_date.strftime('%Y'),
+        return generate_enrollment_report_data([self.course_key], **kwargs).get(self.course_key, [])
+
+
+def generate_enrollment_report_data(course_keys, **kwargs):
+    """
+    Return the enrollments of the given courses for the given dates.
+
+    The enrollments of all the courses are fetched with a single query
+    and then split by course.
+
+    Args:
+        course_keys: List of opaque_keys.edx.keys.CourseKey instances.
+    Kwargs:
+        updated_at: Date string of the day when the enrollments were created.
+        oldest: Date string of the oldest enrollment creation date.
+        latest: Date string of the latest enrollment creation date.
+        since: Only return the enrollments created or changed after this datetime.
+    Returns:
+        Dict containing the list of enrollments by course key.
+    """
+    report_data = {course_key: [] for course_key in course_keys}
+
+    if not report_data:
+        return report_data
+
+    requested_course_keys = {get_normalized_course_id(course_key): course_key for course_key in course_keys}
+
+    courses_intake_of_intent = {
+        course_key: get_course_intake_of_intent(course_key) for course_key in course_keys
+    }
+    course_enrollment_model = get_course_enrollment()
+    course_enrollments = course_enrollment_model.objects.filter(
+        course_id__in=course_keys,
+        **get_enrollment_date_filters(**kwargs)
+    )
+
+    if kwargs.get('since'):
+        course_enrollments = course_enrollments.filter(
+            get_enrollment_changes_filter(course_enrollment_model, kwargs['since']),
+        )
+
+    course_enrollments = course_enrollments.select_related('user', 'user__profile')
+
+    for course_enrollments_chunk in get_chunks(course_enrollments.iterator()):
+        contact_ids = get_salesforce_contact_ids(
+            [course_enrollment.user_id for course_enrollment in course_enrollments_chunk],
         )
-        enrollment_serializer = EnrollmentReportSerializer(data=kwargs)
-        date_data = enrollment_serializer.validated_data if enrollment_serializer.is_valid() else {}
-        updated_at = date_data.get('updated_at', '')
-        oldest = date_data.get('oldest', '')
-        latest = date_data.get('latest', '')
-        course_enrollment_objects = get_course_enrollment().objects
-        report_data = []
-
-        if updated_at:
-            course_enrollments = course_enrollment_objects.filter(
-                created__year=updated_at.year,
-                created__month=updated_at.month,
-                created__day=updated_at.day,
-                course_id=self.course_key,
-            )
-        elif oldest and latest:
-            course_enrollments = course_enrollment_objects.filter(
-                created__range=[oldest, latest],
-                course_id=self.course_key,
-            )
-        elif oldest:
-            course_enrollments = course_enrollment_objects.filter(
-                created__gte=oldest,
-                course_id=self.course_key,
-            )
-        elif latest:
-            course_enrollments = course_enrollment_objects.filter(
-                created__lte=latest,
-                course_id=self.course_key,
-            )
-        else:
-            course_enrollments = course_enrollment_objects.filter(course_id=self.course_key)
-
-        for course_enrollment in course_enrollments:
+
+        for course_enrollment in course_enrollments_chunk:
+            course_key = requested_course_keys.get(get_normalized_course_id(course_enrollment.course_id))
+
+            if course_key is None:
+                LOG.warning(
+                    'The enrollment %s of the course %s does not match the requested courses.',
+                    course_enrollment.id,
+                    course_enrollment.course_id,
+                )
+                continue
+
             user = course_enrollment.user
-            contact_id = get_user_salesforce_contact_id().objects.filter(user=user)
-            user_profile = get_user_profile().objects.get(user_id=user.id)
+            user_profile = getattr(user, 'profile', None)
 
             user_data = {
                 'username': user.username,
@@ -85,10 +106,109 @@ class EnrollmentReport(object):
                 "enrollment_date": str(course_enrollment.created),
                 'mode': course_enrollment.mode,
                 'is_active': course_enrollment.is_active,
-                'contact_id': contact_id[0].contact_id if contact_id else '',
-                'intake_of_intent': course_start_intake_of_intent,
+                'contact_id': contact_ids.get(user.id, ''),
+                'intake_of_intent': courses_intake_of_intent.get(course_key, ''),
             }
 
-            report_data.append(user_data)
+            report_data[course_key].append(user_data)
 
-        return report_data
+    return report_data
+
+
+def get_enrollment_date_filters(**kwargs):
+    """
+    Return the enrollment creation date filters for the given dates.
+
+    The filters are datetime ranges over the created column, so the database
+    is able to use its index instead of evaluating date functions for every row.
+
+    Kwargs:
+        updated_at: Date string of the day when the enrollments were created.
+        oldest: Date string of the oldest enrollment creation date.
+        latest: Date string of the latest enrollment creation date.
+    Returns:
+        Dict containing the queryset filters.
+    """
+    enrollment_serializer = EnrollmentReportSerializer(data=kwargs)
+    date_data = enrollment_serializer.validated_data if enrollment_serializer.is_valid() else {}
+    updated_at = date_data.get('updated_at', '')
+    oldest = date_data.get('oldest', '')
+    latest = date_data.get('latest', '')
+    date_filters = {}
+
+    if updated_at:
+        start_of_day = get_start_of_day(updated_at)
+        date_filters['created__gte'] = start_of_day
+        date_filters['created__lt'] = start_of_day + timedelta(days=1)
+        return date_filters
+
+    if oldest:
+        date_filters['created__gte'] = get_start_of_day(oldest)
+
+    if latest:
+        date_filters['created__lte'] = get_start_of_day(latest)
+
+    return date_filters
+
+
+def get_enrollment_changes_filter(course_enrollment_model, since):
+    """
+    Return the filter of the enrollments created or changed after the given datetime.
+
+    The changes are read from the enrollment history table when the model is tracked,
+    otherwise only the created enrollments are considered.
+
+    Args:
+        course_enrollment_model: CourseEnrollment model class.
+        since: Datetime of the last report generation.
+    Returns:
+        Q object.
+    """
+    changes_filter = Q(created__gt=since)
+    history = getattr(course_enrollment_model, 'history', None)
+
+    if history is not None:
+        changes_filter |= Q(id__in=history.filter(history_date__gt=since).values('id'))
+
+    return changes_filter
+
+
+def get_start_of_day(date):
+    """
+    Return the datetime at the start of the given date in the current time zone.
+    """
+    start_of_day = datetime.combine(date, time.min)
+
+    return timezone.make_aware(start_of_day) if settings.USE_TZ else start_of_day
+
+
+def get_course_intake_of_intent(course_key):
+    """
+    Return the intake of intent value of the course, e.g. 'January 2019'.
+    """
+    course_details = get_course_details().fetch(course_key)
+
+    return '{} {}'.format(
+        course_details.start_date.strftime('%B'),
+        course_details.start_date.strftime('%Y'),
+    )
+
+
+def get_salesforce_contact_ids(user_ids):
+    """
+    Return the Salesforce contact id of the given users.
+
+    Args:
+        user_ids: List of user ids.
+    Returns:
+        Dict containing the first contact id found for every user id.
+    """
+    contact_ids = {}
+    salesforce_contact_ids = get_user_salesforce_contact_id().objects.filter(
+        user_id__in=user_ids,
+    ).values_list('user_id', 'contact_id')
+
+    for user_id, contact_id in salesforce_contact_ids:
+        contact_ids.setdefault(user_id, contact_id)
+
+    return contact_ids
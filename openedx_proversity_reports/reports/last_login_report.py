@@ -7,6 +7,7 @@ from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 
 from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_course_enrollment
+from openedx_proversity_reports.utils import get_chunks
 
 
 LOG = logging.getLogger(__name__)
@@ -34,19 +35,48 @@ class LastLoginReport(object):
         Returns:
             List: Containing the users enrolled in the course and their information.
         """
-        report_data = []
-        course_enrollments = get_course_enrollment().objects.filter(course_id=self.course_key)
-        date_format = kwargs.get('date_format', '%Y-%m-%d')
-
-        for enrollment in course_enrollments:
-            user_last_login_date = enrollment.user.last_login.strftime(date_format)
-            date_of_registration = enrollment.user.date_joined.strftime(date_format)
-
-            report_data.append({
-                'username': enrollment.user.username,
-                'email': enrollment.user.email,
-                'last_login_date': user_last_login_date,
-                'date_of_registration': date_of_registration,
-            })
-
-        return report_data
+        return [
+            user_data for _, user_data in iter_last_login_data([self.course_key], **kwargs)
+        ]
+
+
+def iter_last_login_data(course_keys, **kwargs):
+    """
+    Yield the last login information of the users enrolled in the given courses.
+
+    The user columns are read through a single joined query whose rows are fetched in chunks,
+    so neither the enrollment nor the user objects are built.
+
+    Args:
+        course_keys: List of opaque_keys.edx.keys.CourseKey instances.
+    kwargs:
+        date_format: Contains the python date format for the last login value.
+        since: Only yield the users that have logged in after this datetime.
+    Yields:
+        Tuple: (course key, dict with the information of the enrolled user).
+    """
+    date_format = kwargs.get('date_format', '%Y-%m-%d')
+    since = kwargs.get('since')
+    course_enrollments = get_course_enrollment().objects.filter(
+        course_id__in=course_keys,
+    )
+
+    if since:
+        course_enrollments = course_enrollments.filter(user__last_login__gt=since)
+
+    course_enrollments = course_enrollments.values_list(
+        'course_id',
+        'user__username',
+        'user__email',
+        'user__last_login',
+        'user__date_joined',
+    )
+
+    for course_enrollments_chunk in get_chunks(course_enrollments.iterator()):
+        for course_key, username, email, last_login, date_joined in course_enrollments_chunk:
+            yield course_key, {
+                'username': username,
+                'email': email,
+                'last_login_date': last_login.strftime(date_format) if last_login else '',
+                'date_of_registration': date_joined.strftime(date_format),
+            }
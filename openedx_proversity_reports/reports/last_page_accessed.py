@@ -10,9 +10,11 @@ from openedx_proversity_reports.edxapp_wrapper.get_course_blocks import get_cour
 from openedx_proversity_reports.edxapp_wrapper.get_course_cohort import get_course_cohort
 from openedx_proversity_reports.edxapp_wrapper.get_course_teams import get_course_teams
 from openedx_proversity_reports.edxapp_wrapper.get_modulestore import get_modulestore
+from openedx_proversity_reports.models import LearnerCompletionSummary
+from openedx_proversity_reports.utils import filter_users_with_completions_since
 
 
-def get_last_page_accessed_data(course_list):
+def get_last_page_accessed_data(course_list, since=None):
     """
     Returns a dict with information about the last page accessed
     by the student according to completion model.
@@ -26,6 +28,8 @@ def get_last_page_accessed_data(course_list):
             'vertical_block_id': Parent vertical block id,
         }]
     }
+
+    If since is provided, only the students with completions modified after that date are included.
     """
     last_page_data = {}
 
@@ -43,22 +47,24 @@ def get_last_page_accessed_data(course_list):
             is_staff=0,
         )
 
+        if since:
+            enrolled_students = filter_users_with_completions_since(enrolled_students, course_key, since)
+
         if not enrolled_students:
             continue
 
         user_data = []
         usage_key = get_modulestore().make_course_usage_key(course_key)
         blocks = get_course_blocks(enrolled_students.first(), usage_key)
+        latest_completions = get_latest_completions(course_key)
 
         for user in enrolled_students:
-            last_completed_child_position = get_block_completion_model().get_latest_block_completed(
-                user,
-                course_key
-            )
+            latest_completion = latest_completions.get(user.id)
             parent_tree_name = ''
             vertical_block_id = ''
 
-            if last_completed_child_position:
+            if latest_completion:
+                latest_block_key, last_time_accessed = latest_completion
                 user_course_cohort = get_course_cohort(user=user, course_key=course_key)
                 user_course_teams = get_course_teams(membership__user=user, course_id=course_key)
                 vertical_blocks = blocks.topological_traversal(
@@ -68,7 +74,7 @@ def get_last_page_accessed_data(course_list):
 
                 for vertical in vertical_blocks:
                     for component in blocks.get_children(vertical):
-                        if component.block_id == last_completed_child_position.block_key.block_id:
+                        if component.block_id == latest_block_key.block_id:
                             parent_tree_name = '-'.join(get_parent_display_names(blocks, component))
                             component_parent = blocks.get_parents(component)
                             vertical_block_id = component_parent[0].block_id
@@ -77,9 +83,9 @@ def get_last_page_accessed_data(course_list):
                     'username': user.username,
                     'user_cohort': user_course_cohort.name if user_course_cohort else '',
                     'user_teams': user_course_teams[0].name if user_course_teams else '',
-                    'last_time_accessed': str(last_completed_child_position.modified),
+                    'last_time_accessed': str(last_time_accessed),
                     'last_page_viewed': parent_tree_name,
-                    'block_id': last_completed_child_position.block_key.block_id,
+                    'block_id': latest_block_key.block_id,
                     'vertical_block_id': vertical_block_id,
                 })
 
@@ -89,6 +95,50 @@ def get_last_page_accessed_data(course_list):
     return last_page_data
 
 
+def get_latest_completions(course_key):
+    """
+    Return the latest completed block of the learners of the given course.
+
+    The completion summaries are read first, then the block completions modified after
+    the latest summarized completion are read with a single query, so the learners with
+    new completions or without a summary are also up to date.
+
+    Args:
+        course_key: opaque_keys.edx.keys.CourseKey instance.
+    Returns:
+        Dict containing a (block key, completion date) tuple by user id.
+    """
+    latest_completions = {}
+    latest_summarized_completion = None
+    completion_summaries = LearnerCompletionSummary.objects.filter(
+        course_key=course_key,
+        latest_block_key__isnull=False,
+    ).values_list('user_id', 'latest_block_key', 'latest_completion')
+
+    for user_id, latest_block_key, latest_completion in completion_summaries:
+        latest_completions[user_id] = (latest_block_key, latest_completion)
+
+        if latest_completion and (not latest_summarized_completion or latest_completion > latest_summarized_completion):
+            latest_summarized_completion = latest_completion
+
+    block_completions = get_block_completion_model().objects.filter(course_key=course_key)
+
+    if latest_summarized_completion:
+        block_completions = block_completions.filter(modified__gt=latest_summarized_completion)
+
+    block_completions = block_completions.order_by('user_id', 'modified').values_list(
+        'user_id',
+        'block_key',
+        'modified',
+    )
+
+    # The completions are ordered by date, so the latest one of every user is kept.
+    for user_id, block_key, modified in block_completions.iterator():
+        latest_completions[user_id] = (block_key, modified)
+
+    return latest_completions
+
+
 def get_parent_tree(root_block, unit_block):
     """
     Util function to get the parent block tree of the provided unit_block.
@@ -1,33 +1,39 @@
 """
 Learning Tracker Report Class.
 """
-import json
+import hashlib
 import logging
 import six
+from collections import defaultdict
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.functional import cached_property
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 from openedx_proversity_reports.edxapp_wrapper.get_block_structure_library import get_course_in_cache
 from openedx_proversity_reports.edxapp_wrapper.get_certificates_models import (
     get_certificate_statuses,
-    get_certificate_status_for_student
+    get_course_certificate_statuses,
 )
 from openedx_proversity_reports.edxapp_wrapper.get_course_cohort import get_course_cohort
 from openedx_proversity_reports.edxapp_wrapper.get_course_grade_library import (
     get_course_grade_factory,
-    get_grading_context
+    get_grading_context,
+    get_persistent_course_grade_model,
+    get_persistent_subsection_grade_model,
 )
 from openedx_proversity_reports.edxapp_wrapper.get_course_teams import get_course_teams
 from openedx_proversity_reports.edxapp_wrapper.get_courseware_library import get_course_by_id
-from openedx_proversity_reports.edxapp_wrapper.get_student_library import get_user_profile
+from openedx_proversity_reports.edxapp_wrapper.get_modulestore import get_modulestore
 from openedx_proversity_reports.utils import get_enrolled_users
 
 
 LOG = logging.getLogger(__name__)
 KEY_SUBSECTION_BLOCK = 'subsection_block'
+GRADING_CONTEXT_CACHE_KEY = 'openedx-proversity-reports-grading-context-{}'
 
 
 class LearningTrackerReport(object):
@@ -35,28 +41,144 @@ class LearningTrackerReport(object):
     Learning Tracker Report Class.
     """
 
-    def __init__(self, course_id):
+    def __init__(self, course_id, persisted_only=False, users=None):
         try:
             self.course_key = CourseKey.from_string(course_id)
         except InvalidKeyError:
             LOG.error('Invalid course_id = %s for learning tracker report', course_id)
             raise InvalidKeyError
 
+        self.persisted_only = persisted_only
+        self.users = users
+
     @cached_property
     def assignments_data(self):
         """
-        Cached property that returns the block structure.
+        Cached property that returns the graded subsections by assignment type.
+
+        The graded subsections are stored in the django cache by course key and published version,
+        so the course descriptor tree is only walked once per course version.
+        Returns:
+            Dict: {
+                <assignment type>: [{
+                    location: Subsection UsageKey.
+                    due: Subsection due date.
+                    format: Subsection assignment type.
+                }]
+            }
+        """
+        course_version = self._get_course_version()
+        cache_key = GRADING_CONTEXT_CACHE_KEY.format(
+            hashlib.md5(u'{}-{}'.format(self.course_key, course_version).encode('utf-8')).hexdigest(),
+        )
+        graded_subsections_by_type = cache.get(cache_key) if course_version else None
+
+        if graded_subsections_by_type is None:
+            graded_subsections_by_type = self._get_graded_subsections_by_type()
+
+            if course_version:
+                cache.set(
+                    cache_key,
+                    graded_subsections_by_type,
+                    getattr(settings, 'OPR_GRADING_CONTEXT_CACHE_TIMEOUT', 86400),
+                )
+
+        return {
+            assignment_type: [
+                dict(subsection, location=UsageKey.from_string(subsection['location']))
+                for subsection in subsections
+            ]
+            for assignment_type, subsections in six.iteritems(graded_subsections_by_type)
+        }
+
+    def _get_course_version(self):
+        """
+        Return the published version of the course or None if it could not be determined.
+        """
+        course = get_modulestore().get_course(self.course_key, depth=0)
+        course_version = getattr(course, 'course_version', None) or getattr(course, 'subtree_edited_on', None)
+
+        return unicode(course_version) if course_version else None
+
+    def _get_graded_subsections_by_type(self):
+        """
+        Return the graded subsections of the course grading context in a compact form.
         """
         blocks = get_course_in_cache(self.course_key)
-        assignments_data = get_grading_context(get_course_by_id(self.course_key), blocks)
+        grading_context = get_grading_context(get_course_by_id(self.course_key), blocks)
+        graded_subsections_by_type = {}
+
+        for assignment_type, subsections_info in six.iteritems(
+                grading_context.get('all_graded_subsections_by_type', {})):
+            graded_subsections_by_type[assignment_type] = [
+                {
+                    'location': unicode(subsection_info[KEY_SUBSECTION_BLOCK].location),
+                    'due': subsection_info[KEY_SUBSECTION_BLOCK].due,
+                    'format': subsection_info[KEY_SUBSECTION_BLOCK].format,
+                }
+                for subsection_info in subsections_info
+                if subsection_info.get(KEY_SUBSECTION_BLOCK)
+            ]
+
+        return graded_subsections_by_type
+
+    @cached_property
+    def persisted_course_grades(self):
+        """
+        Cached property that returns the persisted course grade percent by user id.
+        """
+        persisted_course_grades = get_persistent_course_grade_model().objects.filter(
+            course_id=self.course_key,
+            **self._get_users_filter()
+        ).values_list('user_id', 'percent_grade')
 
-        return assignments_data.get('all_graded_subsections_by_type', {})
+        return dict(persisted_course_grades)
+
+    @cached_property
+    def persisted_subsection_attempts(self):
+        """
+        Cached property that returns the first attempted date of the persisted subsection grades
+        by user id and subsection location.
+        """
+        subsection_attempts = defaultdict(dict)
+        persisted_subsection_grades = get_persistent_subsection_grade_model().objects.filter(
+            course_id=self.course_key,
+            first_attempted__isnull=False,
+            **self._get_users_filter()
+        ).values_list('user_id', 'usage_key', 'first_attempted')
+
+        for user_id, usage_key, first_attempted in persisted_subsection_grades:
+            subsection_attempts[user_id][usage_key.map_into_course(self.course_key)] = first_attempted
+
+        return subsection_attempts
+
+    @cached_property
+    def certificate_statuses(self):
+        """
+        Cached property that returns the certificate status by user id,
+        only for the report users if they were provided.
+        """
+        return get_course_certificate_statuses(
+            self.course_key,
+            user_ids=self.users.values('id') if self.users is not None else None,
+        )
+
+    def _get_users_filter(self):
+        """
+        Return the filter of the persisted grades by the report users, if they were provided.
+        """
+        if self.users is None:
+            return {}
+
+        return {'user_id__in': self.users.values('id')}
 
     def generate_report(self):
         """
-        Returns a List with the metric for every user in the course.
+        Returns a List with the metric for every user in the course,
+        or only for the report users if they were provided.
         """
-        enrolled_users = get_enrolled_users(self.course_key)
+        enrolled_users = self.users if self.users is not None else get_enrolled_users(self.course_key)
+        enrolled_users = enrolled_users.select_related('proversity_session_metrics')
         report_data = []
 
         if not enrolled_users:
@@ -65,6 +187,7 @@ class LearningTrackerReport(object):
         for user in enrolled_users:
             cohort = get_course_cohort(user=user, course_key=self.course_key)
             teams = get_course_teams(membership__user=user, course_id=self.course_key)
+            session_metrics = getattr(user, 'proversity_session_metrics', None)
 
             user_data = {
                 'username': user.username,
@@ -72,34 +195,57 @@ class LearningTrackerReport(object):
                 'user_id': user.id,
                 'team': teams[0].name if teams else '',
                 'cohort': cohort.name if cohort else '',
-                'average_session_length': self._get_average_session_length(user),
-                'cumulative_grade': self._get_cumulative_grade(user),
+                'average_session_length': self._get_average_session_length(session_metrics),
                 'has_verified_certificate': self._has_verified_certificate(user),
-                'time_between_sessions': self._get_time_bewteen_sessions(user),
+                'time_between_sessions': self._get_time_bewteen_sessions(session_metrics),
                 'weekly_clicks': self._get_weekly_clicks(user),
-                'number_of_graded_assessment': self._get_number_of_graded_assessment(user),
-                'timeliness_of_submissions': self._get_timeliness_of_submissions(user),
             }
+            user_data.update(self._get_grade_metrics(user))
 
             report_data.append(user_data)
 
         return report_data
 
-    def _get_average_session_length(self, user):
+    def _get_grade_metrics(self, user):
         """
-        Calculate learner metric for "Average Session Length".
+        Return the grade based metrics for the given user.
+
+        If the report runs in persisted only mode and the user has a persisted course grade,
+        the metrics are calculated from the persisted grades loaded for the whole course,
+        otherwise the course grade of the user is read through the CourseGradeFactory.
         Args:
             user: User Model.
         Returns:
-            Float (Average Session Length).
+            Dict (cumulative_grade, number_of_graded_assessment and timeliness_of_submissions).
         """
-        user_profile = get_user_profile().objects.get(user_id=user.id)
+        if self.persisted_only and user.id in self.persisted_course_grades:
+            subsection_attempts = self.persisted_subsection_attempts.get(user.id, {})
+
+            return {
+                'cumulative_grade': self.persisted_course_grades[user.id],
+                'number_of_graded_assessment': self._get_persisted_number_of_graded_assessment(
+                    subsection_attempts,
+                ),
+                'timeliness_of_submissions': self._get_persisted_timeliness_of_submissions(
+                    subsection_attempts,
+                ),
+            }
 
-        try:
-            meta = json.loads(user_profile.meta)
-            return float(meta.get('avg_session', 0))
-        except ValueError:
-            return 0
+        return {
+            'cumulative_grade': self._get_cumulative_grade(user),
+            'number_of_graded_assessment': self._get_number_of_graded_assessment(user),
+            'timeliness_of_submissions': self._get_timeliness_of_submissions(user),
+        }
+
+    def _get_average_session_length(self, session_metrics):
+        """
+        Calculate learner metric for "Average Session Length".
+        Args:
+            session_metrics: UserSessionMetrics Model or None.
+        Returns:
+            Float (Average Session Length).
+        """
+        return session_metrics.avg_session if session_metrics else 0
 
     def _get_cumulative_grade(self, user):
         """
@@ -124,35 +270,41 @@ class LearningTrackerReport(object):
         course_grade = get_course_grade_factory().read(user=user, course_key=self.course_key)
         count = 0
 
-        for subsections_info in six.itervalues(self.assignments_data):
-            for subsection_info in subsections_info:
-                subsection = subsection_info.get(KEY_SUBSECTION_BLOCK)
+        for subsections in six.itervalues(self.assignments_data):
+            for subsection in subsections:
+                subsection_grade = course_grade.subsection_grade(subsection['location'])
 
-                if not subsection:
-                    continue
+                if subsection_grade.attempted_graded:
+                    count += 1
 
-                subsection_grade = course_grade.subsection_grade(subsection.location)
+        return count
 
-                if subsection_grade.attempted_graded:
+    def _get_persisted_number_of_graded_assessment(self, subsection_attempts):
+        """
+        Number of graded assignment submissions calculated from the persisted subsection grades.
+        Args:
+            subsection_attempts: Dict (First attempted date by subsection location).
+        Returns:
+            Int (Number of graded subsection that has an associated assignment type).
+        """
+        count = 0
+
+        for subsections in six.itervalues(self.assignments_data):
+            for subsection in subsections:
+                if subsection['location'] in subsection_attempts:
                     count += 1
 
         return count
 
-    def _get_time_bewteen_sessions(self, user):
+    def _get_time_bewteen_sessions(self, session_metrics):
         """
         Calculate learner metrics for "Time between sessions".
         Args:
-            user: User Model.
+            session_metrics: UserSessionMetrics Model or None.
         Returns:
             Float (Time between sessions).
         """
-        user_profile = get_user_profile().objects.get(user_id=user.id)
-
-        try:
-            meta = json.loads(user_profile.meta)
-            return float(meta.get('time_between_sessions', 0))
-        except ValueError:
-            return 0
+        return session_metrics.time_between_sessions if session_metrics else 0
 
     def _get_timeliness_of_submissions(self, user):
         """
@@ -166,18 +318,33 @@ class LearningTrackerReport(object):
 
         submissions_timeliness = timedelta()
 
-        for subsections_info in six.itervalues(self.assignments_data):
-            for subsection_info in subsections_info:
-                subsection = subsection_info.get(KEY_SUBSECTION_BLOCK)
+        for subsections in six.itervalues(self.assignments_data):
+            for subsection in subsections:
+                subsection_grade = course_grade.subsection_grade(subsection['location'])
+                first_attempted = subsection_grade.all_total.first_attempted
 
-                if not subsection:
-                    continue
+                if subsection_grade.attempted_graded and subsection['due'] and first_attempted:
+                    submissions_timeliness += subsection['due'] - first_attempted
 
-                subsection_grade = course_grade.subsection_grade(subsection.location)
-                first_attempted = subsection_grade.all_total.first_attempted
+        return submissions_timeliness.days
+
+    def _get_persisted_timeliness_of_submissions(self, subsection_attempts):
+        """
+        The number of days that user submits assignments before the posted due date,
+        calculated from the persisted subsection grades.
+        Args:
+            subsection_attempts: Dict (First attempted date by subsection location).
+        Returns:
+            Int (Number of days).
+        """
+        submissions_timeliness = timedelta()
 
-                if subsection_grade.attempted_graded and subsection.due and first_attempted:
-                    submissions_timeliness += subsection.due - first_attempted
+        for subsections in six.itervalues(self.assignments_data):
+            for subsection in subsections:
+                first_attempted = subsection_attempts.get(subsection['location'])
+
+                if subsection['due'] and first_attempted:
+                    submissions_timeliness += subsection['due'] - first_attempted
 
         return submissions_timeliness.days
 
@@ -199,9 +366,7 @@ class LearningTrackerReport(object):
         Returns:
             Boolean (True/False).
         """
-        certificate = get_certificate_status_for_student(user, self.course_key)
-
-        if certificate.get('status') in get_certificate_statuses().PASSED_STATUSES:
+        if self.certificate_statuses.get(user.id) in get_certificate_statuses().PASSED_STATUSES:
             return True
 
         return False
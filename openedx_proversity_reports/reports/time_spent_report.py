@@ -1,21 +1,33 @@
 """
 Time spent reports.
 """
+import hashlib
 import logging
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
 
+import pytz
 from apiclient.discovery import build
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
 from google.oauth2 import service_account
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 
 from openedx_proversity_reports.edxapp_wrapper.get_course_blocks import get_course_blocks
 from openedx_proversity_reports.edxapp_wrapper.get_modulestore import get_modulestore
+from openedx_proversity_reports.google_services.rate_limit import GOOGLE_ANALYTICS_BUCKET, call_with_rate_limit
 
 
 ANALYTICS_API_SCOPES = ['https://www.googleapis.com/auth/analytics.readonly']
 COURSEWARE_URL_PREFIX = '/courseware'
+# Max number of report requests allowed by the Analytics Reporting API V4 in a batchGet request.
+MAX_REPORT_REQUESTS_PER_BATCH = 5
+ANALYTICS_SERVICE_CACHE = {}
+ANALYTICS_DAY_CACHE_KEY = 'openedx-proversity-reports-analytics-day-{}'
+GOOGLE_ANALYTICS_DATE_FORMAT = '%Y%m%d'
 logger = logging.getLogger(__name__)
 
 
@@ -29,20 +41,25 @@ def get_time_spent_report_data(course_list):
         Course structure and Google Anlytics data or an empty dict.
         {
             <course_id>: {
-                course_structure: Course structure by subsection.
+                course_structure: Course structure by subsection. Every vertical includes the page views
+                                  and the average time on page of its courseware urls.
                 analytics_data: Google Analytics data per course.
             }
         }
     """
     course_structure = {}
+    course_keys = {}
 
     for course_id in course_list:
         try:
-            course_key = CourseKey.from_string(course_id)
+            course_keys[course_id] = CourseKey.from_string(course_id)
         except InvalidKeyError:
             continue
 
-        analytics_data = fetch_data_from_analytics(course_id)
+    courses_analytics_data = fetch_courses_data_from_analytics(list(course_keys))
+
+    for course_id, course_key in course_keys.items():
+        analytics_data = courses_analytics_data.get(course_id, [])
 
         # If not GA data, just continue and don't fetch users or course data.
         if not analytics_data:
@@ -74,6 +91,7 @@ def get_time_spent_report_data(course_list):
         vertical_name = ''
         vertical_id = ''
         vertical_position = 0
+        sequential_vertical_position = 0
 
         for block in course_blocks:
             if block.block_type == 'course':
@@ -87,11 +105,13 @@ def get_time_spent_report_data(course_list):
                 sequential_name = blocks.get_xblock_field(block, 'display_name')
                 sequential_id = block.block_id
                 sequential_position += 1
+                sequential_vertical_position = 0
             elif block.block_type == 'vertical':
                 vertical_name = blocks.get_xblock_field(block, 'display_name')
                 vertical_id = block.block_id
                 # The vertical position must be only incremental.
                 vertical_position += 1
+                sequential_vertical_position += 1
 
                 course_block_data.append({
                     'chapter_name': chapter_name,
@@ -103,8 +123,11 @@ def get_time_spent_report_data(course_list):
                     'vertical_name': vertical_name,
                     'vertical_id': vertical_id,
                     'vertical_position': vertical_position,
+                    'sequential_vertical_position': sequential_vertical_position,
                 })
 
+        add_analytics_data_to_verticals(course_block_data, analytics_data)
+
         temp_data_dict = {
             'course_structure': course_block_data,
             'analytics_data': analytics_data
@@ -115,6 +138,76 @@ def get_time_spent_report_data(course_list):
     return course_structure
 
 
+def add_analytics_data_to_verticals(course_block_data, analytics_data):
+    """
+    Adds the page views and the average time on page of the GA page paths to the verticals.
+
+    The courseware urls are resolved with an index by (chapter id, sequential id, position in the sequential),
+    and the average time on page of the urls of the same vertical is weighted by their page views.
+
+    Args:
+        course_block_data: List of the course verticals.
+        analytics_data: GA data list as it's returned by fetch_data_from_analytics.
+    """
+    vertical_index = {}
+
+    for vertical_data in course_block_data:
+        vertical_data['page_views'] = 0
+        vertical_data['avg_time_on_page'] = 0.0
+        vertical_index[(
+            vertical_data['chapter_id'],
+            vertical_data['sequential_id'],
+            vertical_data['sequential_vertical_position'],
+        )] = vertical_data
+
+    for page_data in analytics_data:
+        vertical_data = vertical_index.get(get_courseware_url_location(page_data.get('page_path', '')))
+
+        if not vertical_data:
+            continue
+
+        page_views = int(page_data.get('page_views', 0) or 0)
+        total_page_views = vertical_data['page_views'] + page_views
+
+        if total_page_views:
+            vertical_data['avg_time_on_page'] = (
+                vertical_data['avg_time_on_page'] * vertical_data['page_views'] +
+                float(page_data.get('avg_time_on_page', 0) or 0) * page_views
+            ) / total_page_views
+
+        vertical_data['page_views'] = total_page_views
+
+
+def get_courseware_url_location(page_path):
+    """
+    Returns the (chapter id, sequential id, position in the sequential) tuple of a courseware url.
+
+    e.g. /courses/<course_id>/courseware/<chapter_id>/<sequential_id>/2/?activate_block_id=...
+    The position is 1 when the url doesn't include it.
+
+    Args:
+        page_path: GA page path.
+    Returns:
+        Tuple or None if the page path is not a sequential courseware url.
+    """
+    url_path = page_path.split('?')[0].split('#')[0]
+
+    if COURSEWARE_URL_PREFIX not in url_path:
+        return None
+
+    url_parts = [part for part in url_path.split(COURSEWARE_URL_PREFIX, 1)[1].split('/') if part]
+
+    if len(url_parts) < 2:
+        return None
+
+    try:
+        position = int(url_parts[2]) if len(url_parts) > 2 else 1
+    except ValueError:
+        position = 1
+
+    return url_parts[0], url_parts[1], position
+
+
 def fetch_data_from_analytics(course_id):
     """
     Returns a dict with info of Google Analytics (GA).
@@ -129,14 +222,202 @@ def fetch_data_from_analytics(course_id):
             avg_time_on_page: Average of time on url path page.
         }]
     """
+    return fetch_courses_data_from_analytics([course_id]).get(course_id, [])
+
+
+def fetch_courses_data_from_analytics(course_ids):
+    """
+    Returns the Google Analytics (GA) data of the given courses.
+
+    The GA data is stored in the django cache by course and day, so only the days
+    that are not cached yet and the last OPR_GOOGLE_ANALYTICS_REFRESH_DAYS days are requested to GA.
+    The days are computed in the GA view timezone, since the ga:date dimension uses it.
+    The data of the requested window is then merged by page path, using the page views to weight
+    the average time on page of every day.
+
+    Args:
+        course_ids: List of course ids.
+    Returns:
+        Dict containing the GA data list of every course id, as it's returned by fetch_data_from_analytics.
+    """
+    today = timezone.now().astimezone(
+        pytz.timezone(getattr(settings, 'OPR_GOOGLE_ANALYTICS_VIEW_TIMEZONE', 'UTC')),
+    ).date()
+    days = [
+        today - timedelta(days=days_ago)
+        for days_ago in range(getattr(settings, 'OPR_GOOGLE_ANALYTICS_DAYS', 30), -1, -1)
+    ]
+    # The data of the most recent days is still being processed by GA, so it's never cached.
+    first_refresh_day = today - timedelta(days=max(getattr(settings, 'OPR_GOOGLE_ANALYTICS_REFRESH_DAYS', 2), 1) - 1)
+    courses_daily_data = {}
+    missing_days = {}
+
+    for course_id in course_ids:
+        day_cache_keys = {get_analytics_day_cache_key(course_id, day): day for day in days if day < first_refresh_day}
+        cached_data = cache.get_many(day_cache_keys.keys())
+        courses_daily_data[course_id] = {
+            day_cache_keys[cache_key]: day_data for cache_key, day_data in cached_data.items()
+        }
+        missing_days[course_id] = [day for day in days if day not in courses_daily_data[course_id]]
+
+    fetched_daily_data = fetch_daily_data_from_analytics({
+        course_id: get_contiguous_date_ranges(course_missing_days)
+        for course_id, course_missing_days in missing_days.items() if course_missing_days
+    })
+
+    for course_id, course_daily_data in fetched_daily_data.items():
+        for day in missing_days[course_id]:
+            day_data = course_daily_data.get(day, [])
+            courses_daily_data[course_id][day] = day_data
+
+            if day < first_refresh_day:
+                cache.set(
+                    get_analytics_day_cache_key(course_id, day),
+                    day_data,
+                    getattr(settings, 'OPR_GOOGLE_ANALYTICS_CACHE_TIMEOUT', 2678400),
+                )
+
+    return {
+        course_id: merge_analytics_daily_data(
+            [courses_daily_data[course_id].get(day, []) for day in days],
+        ) for course_id in course_ids
+    }
+
 
-    def initialize_analytics_reporting():
-        """
-        Initializes an Analytics Reporting API V4 service object.
+def get_contiguous_date_ranges(days):
+    """
+    Returns the (start date, end date) tuples of the contiguous runs of the given days.
+
+    e.g. [2019-01-01, 2019-01-02, 2019-01-05] -> [(2019-01-01, 2019-01-02), (2019-01-05, 2019-01-05)]
+
+    Args:
+        days: Sorted list of dates.
+    Returns:
+        List of (start date, end date) tuples.
+    """
+    date_ranges = []
 
-        Returns:
-            An authorized Analytics Reporting API V4 service object.
-        """
+    for day in days:
+        if date_ranges and date_ranges[-1][1] + timedelta(days=1) == day:
+            date_ranges[-1] = (date_ranges[-1][0], day)
+        else:
+            date_ranges.append((day, day))
+
+    return date_ranges
+
+
+def fetch_daily_data_from_analytics(date_ranges):
+    """
+    Returns the Google Analytics (GA) data of the given courses by day.
+
+    The Analytics Reporting API V4 requires the same date ranges in all the report requests
+    of a batchGet request, so the report requests are grouped by date range and up to
+    MAX_REPORT_REQUESTS_PER_BATCH report requests of the same date range are sent in every batchGet
+    request. The next pages of every report are requested until there are no more rows.
+
+    Args:
+        date_ranges: Dict containing the list of (start date, end date) tuples to request for every course id.
+    Returns:
+        Dict containing the GA data list of every day by course id.
+    """
+    analytics_view_id = getattr(settings, 'OPR_GOOGLE_ANALYTICS_VIEW_ID', None)
+
+    if not analytics_view_id:
+        logger.error('Google Analytics view id has not been provided.')
+        raise GoogleAnalyticsCredentialsError('Google Analytics view id has not been provided.')
+
+    daily_data = {course_id: defaultdict(list) for course_id in date_ranges}
+    page_tokens = sorted(
+        (date_range, course_id, None)
+        for course_id, course_date_ranges in date_ranges.items()
+        for date_range in course_date_ranges
+    )
+
+    if not page_tokens:
+        return daily_data
+
+    analytics_service = get_analytics_service()
+
+    while page_tokens:
+        date_range = page_tokens[0][0]
+        requested_page_tokens = [
+            page_token for page_token in page_tokens if page_token[0] == date_range
+        ][:MAX_REPORT_REQUESTS_PER_BATCH]
+        page_tokens = [page_token for page_token in page_tokens if page_token not in requested_page_tokens]
+        response = call_with_rate_limit(
+            GOOGLE_ANALYTICS_BUCKET,
+            analytics_service.reports().batchGet(
+                body={
+                    'reportRequests': [
+                        get_analytics_report_request(analytics_view_id, course_id, date_range, page_token)
+                        for _, course_id, page_token in requested_page_tokens
+                    ],
+                }
+            ).execute,
+        )
+
+        # The reports are returned in the same order of the report requests.
+        for (_, course_id, _), report in zip(requested_page_tokens, response.get('reports', [])):
+            for day, page_data in parse_analytics_report(report):
+                daily_data[course_id][day].append(page_data)
+
+            if report.get('nextPageToken'):
+                page_tokens.append((date_range, course_id, report.get('nextPageToken')))
+
+    return daily_data
+
+
+def merge_analytics_daily_data(daily_data):
+    """
+    Merges the GA data of several days by page path.
+
+    The page views are added and the average time on page is weighted by the page views of every day.
+
+    Args:
+        daily_data: List with the GA data list of every day.
+    Returns:
+        List of dicts with the page path, page views and average time on page.
+    """
+    page_views = OrderedDict()
+    time_on_page = defaultdict(float)
+
+    for day_data in daily_data:
+        for page_data in day_data:
+            page_path = page_data.get('page_path', '')
+            day_page_views = int(page_data.get('page_views', 0) or 0)
+            page_views[page_path] = page_views.get(page_path, 0) + day_page_views
+            time_on_page[page_path] += day_page_views * float(page_data.get('avg_time_on_page', 0) or 0)
+
+    # The values are returned as strings, as they are returned by the Analytics Reporting API.
+    return [
+        {
+            'page_path': page_path,
+            'page_views': str(path_page_views),
+            'avg_time_on_page': str(time_on_page[page_path] / path_page_views if path_page_views else 0.0),
+        } for page_path, path_page_views in page_views.items()
+    ]
+
+
+def get_analytics_day_cache_key(course_id, day):
+    """
+    Returns the django cache key of the GA data of the given course and day.
+    """
+    return ANALYTICS_DAY_CACHE_KEY.format(
+        hashlib.md5('{}-{}'.format(course_id, day.isoformat()).encode('utf-8')).hexdigest(),
+    )
+
+
+def get_analytics_service():
+    """
+    Returns the Analytics Reporting API V4 service object.
+
+    The service object is built only once per process, since building it
+    requires loading the discovery document.
+
+    Returns:
+        An authorized Analytics Reporting API V4 service object.
+    """
+    if ANALYTICS_SERVICE_CACHE.get('service') is None:
         ga_credentials = getattr(settings, 'OPR_GOOGLE_ANALYTICS_CREDENTIALS', None)
 
         if not ga_credentials:
@@ -148,91 +429,94 @@ def fetch_data_from_analytics(course_id):
         )
 
         # Build the service object.
-        analytics = build('analyticsreporting', 'v4', credentials=credentials, cache_discovery=False)
-
-        return analytics
+        ANALYTICS_SERVICE_CACHE['service'] = build(
+            'analyticsreporting',
+            'v4',
+            credentials=credentials,
+            cache_discovery=False,
+        )
 
+    return ANALYTICS_SERVICE_CACHE['service']
 
-    def get_analytics_report(analytics):
-        """
-        Queries the Analytics Reporting API V4.
 
-        Args:
-            analytics: An authorized Analytics Reporting API V4 service object.
-        Returns:
-            The Analytics Reporting API V4 response or None if analytics view id is not provided.
-        """
-        course_expression = '{}{}'.format(course_id, COURSEWARE_URL_PREFIX)
-        analytics_view_id = getattr(settings, 'OPR_GOOGLE_ANALYTICS_VIEW_ID', None)
+def get_analytics_report_request(analytics_view_id, course_id, date_range, page_token=None):
+    """
+    Returns the Analytics Reporting API V4 report request of the given course.
 
-        if not analytics_view_id:
-            logger.error('Google Analytics view id has not been provided.')
-            raise GoogleAnalyticsCredentialsError('Google Analytics view id has not been provided.')
+    Args:
+        analytics_view_id: Google Analytics view id.
+        course_id: Course id string.
+        date_range: Tuple with the start and end dates of the report.
+        page_token: Token of the requested report page. **Optional**
+    Returns:
+        Dict with the report request.
+    """
+    course_expression = '{}{}'.format(course_id, COURSEWARE_URL_PREFIX)
+    report_request = {
+        'viewId': analytics_view_id,
+        'dateRanges': [
+            {'startDate': date_range[0].isoformat(), 'endDate': date_range[1].isoformat()},
+        ],
+        'metrics': [
+            {'expression': 'ga:pageviews'},
+            {'expression': 'ga:avgTimeOnPage'},
+        ],
+        'dimensions': [{'name': 'ga:date'}, {'name': 'ga:pagePath'}],
+        "dimensionFilterClauses": [{
+            "filters": [{
+                "dimensionName": 'ga:pagePath',
+                "not": False,
+                "operator": 'PARTIAL',
+                "expressions": [
+                    course_expression,
+                ],
+                "caseSensitive": False
+            }]
+        }],
+        'pageSize': getattr(settings, 'OPR_GOOGLE_ANALYTICS_PAGE_SIZE', 10000),
+    }
+
+    if page_token:
+        report_request['pageToken'] = page_token
+
+    return report_request
+
+
+def parse_analytics_report(report):
+    """
+    Parses a report of the Analytics Reporting API V4 response.
 
-        return analytics.reports().batchGet(
-            body={
-                'reportRequests': [{
-                    'viewId': analytics_view_id,
-                    'dateRanges': [
-                        {'startDate': '30DaysAgo', 'endDate': 'today'},
-                    ],
-                    'metrics': [
-                        {'expression': 'ga:pageviews'},
-                        {'expression': 'ga:avgTimeOnPage'},
-                    ],
-                    'dimensions': [{'name': 'ga:pagePath'}],
-                    "dimensionFilterClauses": [{
-                        "filters": [{
-                            "dimensionName": 'ga:pagePath',
-                            "not": False,
-                            "operator": 'PARTIAL',
-                            "expressions": [
-                                course_expression,
-                            ],
-                            "caseSensitive": False
-                        }]
-                    }]
-                }]
-            }
-        ).execute()
-
-
-    def parse_response(response):
-        """
-        Parses the Analytics Reporting API V4 response.
-
-        Args:
-            response: An Analytics Reporting API V4 response.
-        """
-        data = []
-        for report in response.get('reports', []):
-            for row in report.get('data', {}).get('rows', []):
-                dimensions = row.get('dimensions', [])
-                metric_values = row.get('metrics', [])
-                try:
-                    # Only take the first list value, since only one date range is requested.
-                    dimension_values = metric_values[0].get('values', [])
-
-                    if dimension_values:
-                        # dimensions[0], since only one dimension is requested.
-                        # dimension_values[0], it's the ga:pageviews number.
-                        # dimension_values[1], it's the ga:avgTimeOnPage time number in seconds.
-                        data.append({
-                            'page_path': dimensions[0],
-                            'page_views': dimension_values[0],
-                            'avg_time_on_page': dimension_values[1],
-                        })
-                except IndexError:
-                    logger.error('Google Analytics API response format error.')
-                    raise GoogleAnalyticsResponseError('Google Analytics API response format error.')
-
-        return data
-
-    analytics_service = initialize_analytics_reporting()
-    analytics_response = get_analytics_report(analytics_service)
-    analytics_data_per_dimension = parse_response(analytics_response)
-
-    return analytics_data_per_dimension or []
+    Args:
+        report: A report of the Analytics Reporting API V4 response.
+    Returns:
+        List of (date, dict with the page path, page views and average time on page) tuples.
+    """
+    data = []
+    for row in report.get('data', {}).get('rows', []):
+        dimensions = row.get('dimensions', [])
+        metric_values = row.get('metrics', [])
+        try:
+            # Only take the first list value, since only one date range is requested.
+            dimension_values = metric_values[0].get('values', [])
+
+            if dimension_values:
+                # dimensions[0], it's the ga:date value e.g. 20190101.
+                # dimensions[1], it's the ga:pagePath value.
+                # dimension_values[0], it's the ga:pageviews number.
+                # dimension_values[1], it's the ga:avgTimeOnPage time number in seconds.
+                data.append((
+                    datetime.strptime(dimensions[0], GOOGLE_ANALYTICS_DATE_FORMAT).date(),
+                    {
+                        'page_path': dimensions[1],
+                        'page_views': dimension_values[0],
+                        'avg_time_on_page': dimension_values[1],
+                    },
+                ))
+        except (IndexError, ValueError):
+            logger.error('Google Analytics API response format error.')
+            raise GoogleAnalyticsResponseError('Google Analytics API response format error.')
+
+    return data
 
 
 class GoogleAnalyticsCredentialsError(Exception):
@@ -1,10 +1,12 @@
 """
 Module containing the Time spent per user report.
 """
+import base64
 import logging
+import struct
+from collections import defaultdict
 
 from django.conf import settings
-from google.api_core.exceptions import GoogleAPIError
 from google.cloud import bigquery
 from google.cloud.bigquery.client import Client
 from google.oauth2 import service_account
@@ -13,6 +15,7 @@ from openedx_proversity_reports.edxapp_wrapper.get_block_structure_library impor
 from openedx_proversity_reports.edxapp_wrapper.get_course_cohort import get_course_cohort
 from openedx_proversity_reports.edxapp_wrapper.get_course_teams import get_course_teams
 from openedx_proversity_reports.edxapp_wrapper.get_modulestore import item_not_found_error
+from openedx_proversity_reports.google_services.bigquery_module import get_google_bigquery_query_rows
 
 
 BIGQUERY_API_SCOPES = (
@@ -21,19 +24,25 @@ BIGQUERY_API_SCOPES = (
     'https://www.googleapis.com/auth/bigquery.readonly',
 )
 logger = logging.getLogger(__name__)
+MATRIX_BASE64_ENCODING = 'base64'
+MATRIX_PACKED_FORMAT = 'float32-le'
 
 
 class GenerateTimeSpentPerUserReport(object):
     """
     Class to generate the time spent per user report.
+
+    If filter_by_users is True the BigQuery query only returns the rows of the given users,
+    so every page of a paged report scans only the rows of its own users.
     """
 
-    def __init__(self, users, course_key, query_date):
+    def __init__(self, users, course_key, query_date, filter_by_users=False):
         self.users = users
         self.course_key = course_key
         self.course_block_structure = None
         self.course_blocks = self.get_course_blocks()
         self.query_date = query_date
+        self.filter_by_users = filter_by_users
 
     def get_course_blocks(self):
         """
@@ -72,29 +81,108 @@ class GenerateTimeSpentPerUserReport(object):
         Return:
             google.cloud.bigquery.job.QueryJob.result() instance.
         """
-        bigquery_client = get_google_bigquery_api_client()
-        query_job = bigquery_client.query(
+        usernames = [user.username for user in self.users] if self.filter_by_users else None
+
+        if usernames == []:
+            return []
+
+        return get_google_bigquery_query_rows(
+            get_google_bigquery_api_client(),
             get_google_bigquery_query(
                 course_dataset_name=self.get_google_bigquery_course_id(),
                 date=self.query_date,
                 course_id=str(self.course_key),
+                filter_by_usernames=usernames is not None,
             ),
-            job_config=get_google_bigquery_job_config(),
+            get_google_bigquery_job_config(usernames),
         )
 
-        try:
-            query_job.exception()
-        except GoogleAPIError as api_error:
-            for error_item in api_error.errors:
-                logger.error('Google BigQuery API error: %s', error_item.get('message', ''))
-                return []
+    def get_vertical_rows(self):
+        """
+        Return the vertical blocks of the course in course order with their position metadata.
+
+        Returns:
+            List of tuples: (vertical block id, dict with the chapter, sequential and vertical names and positions)
+        """
+        # The course blocks may be a traversal generator, which can only be consumed once.
+        self.course_blocks = list(self.course_blocks)
+        vertical_rows = []
+        chapter_name = ''
+        chapter_position = 0
+        sequential_name = ''
+        sequential_position = 0
+        vertical_name = ''
+        vertical_position = 0
+
+        for course_block in self.course_blocks:
+            if course_block.block_type == 'chapter':
+                chapter_name = self.course_block_structure.get_xblock_field(
+                    course_block,
+                    'display_name',
+                ) or ''
+                sequential_position = 0
+                chapter_position += 1
+            elif course_block.block_type == 'sequential':
+                sequential_name = self.course_block_structure.get_xblock_field(
+                    course_block,
+                    'display_name',
+                ) or ''
+                sequential_position += 1
+            elif course_block.block_type == 'vertical':
+                vertical_name = self.course_block_structure.get_xblock_field(
+                    course_block,
+                    'display_name',
+                ) or ''
+                # The vertical position must be only incremental.
+                vertical_position += 1
+
+                vertical_rows.append((course_block.block_id, {
+                    'chapter_name': chapter_name,
+                    'chapter_position': chapter_position,
+                    'sequential_name': sequential_name,
+                    'sequential_position': sequential_position,
+                    'vertical_name': vertical_name,
+                    'vertical_position': vertical_position,
+                }))
+
+        return vertical_rows
+
+    def get_time_spent_by_username(self, vertical_rows):
+        """
+        Return the time spent in every vertical by username, aligned with the vertical rows.
+
+        The BigQuery rows are indexed by username, so only the rows of each user
+        are scanned to find the time of every vertical.
+
+        Args:
+            vertical_rows: List returned by get_vertical_rows.
+        Returns:
+            Dict containing the list of time spent values by username.
+        """
+        time_on_asset_column_name = getattr(
+            settings,
+            'OPR_GOOGLE_BIGQUERY_TIME_ON_ASSET_DAILY_COLUMN_NAME',
+            '',
+        )
+        bigquery_rows_by_username = defaultdict(list)
+        time_spent_by_username = {}
+
+        for item_data in self.get_google_bigquery_data():
+            bigquery_rows_by_username[item_data.get('username', '')].append(item_data)
 
-        if query_job.errors:
-            for error_item in query_job.errors:
-                logger.error('Google BigQuery query error: %s', error_item.get('message', ''))
-                return []
+        for username, bigquery_rows in bigquery_rows_by_username.items():
+            time_spent = []
 
-        return query_job.result()
+            for block_id, _ in vertical_rows:
+                bigquery_item = next(
+                    (item_data for item_data in bigquery_rows if block_id in item_data.get('module_id', '')),
+                    {},
+                )
+                time_spent.append(bigquery_item.get(time_on_asset_column_name, 0) if bigquery_item else 0)
+
+            time_spent_by_username[username] = time_spent
+
+        return time_spent_by_username
 
     def generate_report_data(self):
         """
@@ -103,72 +191,24 @@ class GenerateTimeSpentPerUserReport(object):
         if not (self.course_block_structure or self.course_blocks):
             return []
 
-        time_on_asset_column_name = getattr(
-            settings,
-            'OPR_GOOGLE_BIGQUERY_TIME_ON_ASSET_DAILY_COLUMN_NAME',
-            '',
-        )
-        bigquery_data = list(self.get_google_bigquery_data())
+        vertical_rows = self.get_vertical_rows()
+        time_spent_by_username = self.get_time_spent_by_username(vertical_rows)
 
-        if not bigquery_data:
+        if not time_spent_by_username:
             return []
 
-        course_blocks = list(self.course_blocks)
         user_data = []
 
         for user in self.users:
             user_course_cohort = get_course_cohort(user=user, course_key=self.course_key)
             user_course_teams = get_course_teams(membership__user=user, course_id=self.course_key)
+            time_spent = time_spent_by_username.get(user.username, [0] * len(vertical_rows))
             block_data = []
-            chapter_name = ''
-            chapter_position = 0
-            sequential_name = ''
-            sequential_position = 0
-            vertical_name = ''
-            vertical_position = 0
-
-            for course_block in course_blocks:
-                bigquery_item = {}
-
-                for item_data in bigquery_data:
-                    if (item_data.get('username', '') == user.username and
-                            course_block.block_id in item_data.get('module_id', '')):
-                        bigquery_item = item_data
-                        break
-
-                if course_block.block_type == 'chapter':
-                    chapter_name = self.course_block_structure.get_xblock_field(
-                        course_block,
-                        'display_name',
-                    ) or ''
-                    sequential_position = 0
-                    chapter_position += 1
-                elif course_block.block_type == 'sequential':
-                    sequential_name = self.course_block_structure.get_xblock_field(
-                        course_block,
-                        'display_name',
-                    ) or ''
-                    sequential_position += 1
-                elif course_block.block_type == 'vertical':
-                    vertical_name = self.course_block_structure.get_xblock_field(
-                        course_block,
-                        'display_name',
-                    ) or ''
-                    # The vertical position must be only incremental.
-                    vertical_position += 1
-
-                    block_data.append({
-                        'average_time_spent': bigquery_item.get(
-                            time_on_asset_column_name,
-                            0,
-                        ) if bigquery_item else 0,
-                        'chapter_name': chapter_name,
-                        'chapter_position': chapter_position,
-                        'sequential_name': sequential_name,
-                        'sequential_position': sequential_position,
-                        'vertical_name': vertical_name,
-                        'vertical_position': vertical_position,
-                    })
+
+            for (_, vertical_data), average_time_spent in zip(vertical_rows, time_spent):
+                block_item = dict(vertical_data)
+                block_item['average_time_spent'] = average_time_spent
+                block_data.append(block_item)
 
             user_data.append({
                 'username': user.username,
@@ -179,6 +219,62 @@ class GenerateTimeSpentPerUserReport(object):
 
         return user_data
 
+    def generate_report_matrix(self, encoding=None):
+        """
+        Return the time spent per user report data as a matrix.
+
+        The vertical metadata and the users are returned once, and the time spent values
+        are returned as a users x verticals matrix aligned with both lists.
+
+        Args:
+            encoding: 'base64' to return the matrix as a base64 string of little endian float32 values
+                      in row-major order. **Optional**
+        Returns:
+            Dict: {
+                verticals: List of dicts with the chapter, sequential and vertical names and positions.
+                users: List of dicts with the username, cohort and team of every user.
+                time_spent: List of lists with the time spent values or the base64 string.
+                encoding: Encoding of the time_spent matrix, only for encoded matrices.
+            }
+        """
+        report_matrix = {
+            'verticals': [],
+            'users': [],
+            'time_spent': [],
+        }
+
+        if not (self.course_block_structure or self.course_blocks):
+            return report_matrix
+
+        vertical_rows = self.get_vertical_rows()
+        time_spent_by_username = self.get_time_spent_by_username(vertical_rows)
+        report_matrix['verticals'] = [vertical_data for _, vertical_data in vertical_rows]
+
+        if not time_spent_by_username:
+            return report_matrix
+
+        for user in self.users:
+            user_course_cohort = get_course_cohort(user=user, course_key=self.course_key)
+            user_course_teams = get_course_teams(membership__user=user, course_id=self.course_key)
+
+            report_matrix['users'].append({
+                'username': user.username,
+                'user_cohort': user_course_cohort.name if user_course_cohort else '',
+                'user_teams': user_course_teams[0].name if user_course_teams else '',
+            })
+            report_matrix['time_spent'].append(
+                time_spent_by_username.get(user.username, [0] * len(vertical_rows)),
+            )
+
+        if encoding == MATRIX_BASE64_ENCODING:
+            time_spent_values = [float(value or 0) for row in report_matrix['time_spent'] for value in row]
+            report_matrix['time_spent'] = base64.b64encode(
+                struct.pack('<{}f'.format(len(time_spent_values)), *time_spent_values),
+            )
+            report_matrix['encoding'] = MATRIX_PACKED_FORMAT
+
+        return report_matrix
+
 
 def get_google_bigquery_api_client():
     """
@@ -222,10 +318,12 @@ def block_type_filter(block_item):
     return block_item.block_type in block_type_whitelist
 
 
-def get_google_bigquery_job_config():
+def get_google_bigquery_job_config(usernames=None):
     """
     Return the Google BigQuery job configuration.
 
+    Args:
+        usernames: List of usernames passed as the @usernames query parameter. **Optional**
     Returns:
         job_config: google.cloud.bigquery.job.QueryJobConfig instance.
     """
@@ -233,10 +331,13 @@ def get_google_bigquery_job_config():
     job_config.maximum_bytes_billed = getattr(settings, 'OPR_GOOGLE_BIGQUERY_MAX_PROCESS_BYTES', None)
     job_config.use_query_cache = getattr(settings, 'OPR_GOOGLE_BIGQUERY_USE_CACHE', False)
 
+    if usernames is not None:
+        job_config.query_parameters = [bigquery.ArrayQueryParameter('usernames', 'STRING', usernames)]
+
     return job_config
 
 
-def get_google_bigquery_query(course_dataset_name, date, course_id):
+def get_google_bigquery_query(course_dataset_name, date, course_id, filter_by_usernames=False):
     """
     Return the Google BigQuery query for the time_on_asset_daily table.
 
@@ -244,6 +345,7 @@ def get_google_bigquery_query(course_dataset_name, date, course_id):
         course_dataset_name: Dataset name where the table is stored.
         date: Date to filter the query. Date format: '%Y-%m-%d' e.g. '2019-01-01'
         course_id: Course id string.
+        filter_by_usernames: If True the rows are filtered by the @usernames query parameter.
     Returns:
         query_string: The query string to make the query.
     Raises:
@@ -262,12 +364,13 @@ def get_google_bigquery_query(course_dataset_name, date, course_id):
         WHERE module_id LIKE '%vertical%'
         AND course_id = '{course_id}'
         AND time_umid5 IS NOT NULL
-        AND time_umid30 IS NOT NULL
+        AND time_umid30 IS NOT NULL{username_filter}
         AND PARSE_DATETIME('%Y-%m-%d', date) = '{query_date}' LIMIT {max_result_number}
     """.format(
         google_project_id=google_project_id,
         bigquery_dataset=course_dataset_name,
         course_id=course_id,
+        username_filter='\n        AND username IN UNNEST(@usernames)' if filter_by_usernames else '',
         query_date=date,
         max_result_number=query_max_result_number,
     )
@@ -28,6 +28,21 @@ class EnrollmentReportSerializer(serializers.Serializer):
     latest = serializers.DateField(required=False)
 
 
+class LearningTrackerReportSerializer(serializers.Serializer):
+    """
+    Serializer for the learning tracker report parameters.
+    """
+    persisted_only = serializers.BooleanField(required=False, default=False)
+
+
+class DeltaReportSerializer(serializers.Serializer):
+    """
+    Serializer for the since and include_watermark parameters of the reports that support the delta mode.
+    """
+    since = serializers.DateTimeField(required=False)
+    include_watermark = serializers.BooleanField(required=False, default=False)
+
+
 class SalesforceContactIdSerializer(serializers.Serializer):
     """
     Serializer for the Salesforce contact id model.
@@ -126,3 +141,67 @@ class GenerateReportViewSerializer(serializers.Serializer):
                 continue
 
         return course_keys
+
+
+class ReportTasksBatchSerializer(serializers.Serializer):
+    """
+    Serializer for the POST method of the GetReportDataBatchView API endpoint.
+    """
+    task_ids = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        required=True,
+    )
+
+    def validate_task_ids(self, value):
+        """
+        Validate the number of task ids of the batch.
+        """
+        max_task_ids = getattr(settings, 'OPR_REPORT_BATCH_MAX_TASK_IDS', 100)
+
+        if len(value) > max_task_ids:
+            raise ValidationError('Ensure this field has no more than {} elements.'.format(max_task_ids))
+
+        return value
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    """
+    Serializer for the GET method of the ChangeFeedView API endpoint.
+    """
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    page_size = serializers.IntegerField(
+        required=False,
+        default=getattr(settings, 'OPR_CHANGE_FEED_PAGE_SIZE', 100),
+        min_value=1,
+        max_value=getattr(settings, 'OPR_CHANGE_FEED_MAX_PAGE_SIZE', 1000),
+    )
+    course_ids = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=True,
+        required=False,
+    )
+    course_keys = serializers.SerializerMethodField()
+
+    def validate_course_ids(self, value):
+        """
+        Validate that all the course ids are valid, otherwise the feed would include every course.
+        """
+        for course_id in value:
+            try:
+                CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                raise ValidationError('Invalid course id: {}.'.format(course_id))
+
+        return value
+
+    def get_course_keys(self, obj):
+        """
+        Return a list of opaque_keys.edx.keys.CourseKey instances according to the course_ids field.
+
+        Args:
+            obj: Serializer fields object.
+        Returns:
+            course_keys: List containing opaque_keys.edx.keys.CourseKey course instances.
+        """
+        return [CourseKey.from_string(course_id) for course_id in obj.get('course_ids', [])]
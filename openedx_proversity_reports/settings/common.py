@@ -79,7 +79,55 @@ def plugin_settings(settings):
         'generate_enrollment_per_site_report': {
             'backend': 'openedx_proversity_reports.reports.backend.enrollment_per_site_report:EnrollmentReportPerSiteBackend',
             'max_results_per_page': 10
-        }
+        },
+        'generate_completion_report': {
+            'backend': 'openedx_proversity_reports.reports.backend.course_reports:CompletionReportBackend',
+            'max_results_per_page': 100
+        },
+        'generate_learning_tracker_report': {
+            'backend': 'openedx_proversity_reports.reports.backend.course_reports:LearningTrackerReportBackend',
+            'max_results_per_page': 100
+        },
+        'generate_time_spent_per_user_report': {
+            'backend': 'openedx_proversity_reports.reports.backend.course_reports:TimeSpentPerUserReportBackend',
+            'max_results_per_page': 100
+        },
+        'generate_activity_completion_report': {
+            'backend': 'openedx_proversity_reports.reports.backend.course_reports:ActivityCompletionReportBackend',
+            'max_results_per_page': 100
+        },
     }
     settings.OPR_DEFAULT_PAGE_RESULTS_LIMIT = 10
     settings.OPR_COURSE_CONTENT = 'openedx_proversity_reports.edxapp_wrapper.backends.course_content_i_v1'
+    settings.OPR_GRADING_CONTEXT_CACHE_TIMEOUT = 86400  # This value is in seconds.
+    settings.OPR_QUERY_CHUNK_SIZE = 1000
+    settings.OPR_COMPLETION_SUMMARY_UPDATE_DELAY = 60  # This value is in seconds.
+    settings.OPR_SESSION_DATA_FLUSH_INTERVAL = 300  # This value is in seconds.
+    settings.OPR_SESSION_EXCLUDED_PATH_PREFIXES = [
+        '/static/',
+        '/media/',
+        '/favicon.ico',
+    ]
+    settings.OPR_CHANGE_FEED_PAGE_SIZE = 100
+    settings.OPR_CHANGE_FEED_MAX_PAGE_SIZE = 1000
+    settings.OPR_REPORT_JOB_CACHE_TIMEOUT = 86400  # This value is in seconds.
+    settings.OPR_REPORT_BATCH_MAX_TASK_IDS = 100
+    settings.OPR_GOOGLE_ANALYTICS_PAGE_SIZE = 10000
+    settings.OPR_GOOGLE_ANALYTICS_DAYS = 30
+    settings.OPR_GOOGLE_ANALYTICS_CACHE_TIMEOUT = 2678400  # This value is in seconds.
+    settings.OPR_GOOGLE_ANALYTICS_REFRESH_DAYS = 2
+    settings.OPR_GOOGLE_ANALYTICS_VIEW_TIMEZONE = 'UTC'
+    settings.OPR_GOOGLE_API_RATE_LIMITS = {
+        'google_analytics': {
+            'requests': 10,
+            'period': 1,  # This value is in seconds.
+        },
+        'google_bigquery': {
+            'requests': 5,
+            'period': 1,  # This value is in seconds.
+        },
+    }
+    settings.OPR_GOOGLE_API_MAX_RETRIES = 5
+    settings.OPR_GOOGLE_API_BACKOFF_BASE = 1  # This value is in seconds.
+    settings.OPR_GOOGLE_API_BACKOFF_MAX = 60  # This value is in seconds.
+    settings.OPR_REPORT_RESULT_CODEC = None  # Set to 'zlib-json' to compress the report task results.
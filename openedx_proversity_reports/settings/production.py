@@ -157,3 +157,98 @@ def plugin_settings(settings):
         'OPR_COURSE_CONTENT',
         settings.OPR_COURSE_CONTENT,
     )
+
+    settings.OPR_GRADING_CONTEXT_CACHE_TIMEOUT = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GRADING_CONTEXT_CACHE_TIMEOUT',
+        settings.OPR_GRADING_CONTEXT_CACHE_TIMEOUT,
+    )
+
+    settings.OPR_QUERY_CHUNK_SIZE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_QUERY_CHUNK_SIZE',
+        settings.OPR_QUERY_CHUNK_SIZE,
+    )
+
+    settings.OPR_COMPLETION_SUMMARY_UPDATE_DELAY = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_COMPLETION_SUMMARY_UPDATE_DELAY',
+        settings.OPR_COMPLETION_SUMMARY_UPDATE_DELAY,
+    )
+
+    settings.OPR_SESSION_DATA_FLUSH_INTERVAL = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_SESSION_DATA_FLUSH_INTERVAL',
+        settings.OPR_SESSION_DATA_FLUSH_INTERVAL,
+    )
+
+    settings.OPR_SESSION_EXCLUDED_PATH_PREFIXES = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_SESSION_EXCLUDED_PATH_PREFIXES',
+        settings.OPR_SESSION_EXCLUDED_PATH_PREFIXES,
+    )
+
+    settings.OPR_CHANGE_FEED_PAGE_SIZE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_CHANGE_FEED_PAGE_SIZE',
+        settings.OPR_CHANGE_FEED_PAGE_SIZE,
+    )
+
+    settings.OPR_CHANGE_FEED_MAX_PAGE_SIZE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_CHANGE_FEED_MAX_PAGE_SIZE',
+        settings.OPR_CHANGE_FEED_MAX_PAGE_SIZE,
+    )
+
+    settings.OPR_REPORT_JOB_CACHE_TIMEOUT = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_REPORT_JOB_CACHE_TIMEOUT',
+        settings.OPR_REPORT_JOB_CACHE_TIMEOUT,
+    )
+
+    settings.OPR_REPORT_BATCH_MAX_TASK_IDS = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_REPORT_BATCH_MAX_TASK_IDS',
+        settings.OPR_REPORT_BATCH_MAX_TASK_IDS,
+    )
+
+    settings.OPR_REPORT_RESULT_CODEC = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_REPORT_RESULT_CODEC',
+        settings.OPR_REPORT_RESULT_CODEC,
+    )
+
+    settings.OPR_GOOGLE_ANALYTICS_PAGE_SIZE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_ANALYTICS_PAGE_SIZE',
+        settings.OPR_GOOGLE_ANALYTICS_PAGE_SIZE,
+    )
+
+    settings.OPR_GOOGLE_ANALYTICS_DAYS = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_ANALYTICS_DAYS',
+        settings.OPR_GOOGLE_ANALYTICS_DAYS,
+    )
+
+    settings.OPR_GOOGLE_ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_ANALYTICS_CACHE_TIMEOUT',
+        settings.OPR_GOOGLE_ANALYTICS_CACHE_TIMEOUT,
+    )
+
+    settings.OPR_GOOGLE_ANALYTICS_REFRESH_DAYS = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_ANALYTICS_REFRESH_DAYS',
+        settings.OPR_GOOGLE_ANALYTICS_REFRESH_DAYS,
+    )
+
+    settings.OPR_GOOGLE_ANALYTICS_VIEW_TIMEZONE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_ANALYTICS_VIEW_TIMEZONE',
+        settings.OPR_GOOGLE_ANALYTICS_VIEW_TIMEZONE,
+    )
+
+    settings.OPR_GOOGLE_API_RATE_LIMITS = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_API_RATE_LIMITS',
+        settings.OPR_GOOGLE_API_RATE_LIMITS,
+    )
+
+    settings.OPR_GOOGLE_API_MAX_RETRIES = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_API_MAX_RETRIES',
+        settings.OPR_GOOGLE_API_MAX_RETRIES,
+    )
+
+    settings.OPR_GOOGLE_API_BACKOFF_BASE = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_API_BACKOFF_BASE',
+        settings.OPR_GOOGLE_API_BACKOFF_BASE,
+    )
+
+    settings.OPR_GOOGLE_API_BACKOFF_MAX = getattr(settings, 'ENV_TOKENS', {}).get(
+        'OPR_GOOGLE_API_BACKOFF_MAX',
+        settings.OPR_GOOGLE_API_BACKOFF_MAX,
+    )
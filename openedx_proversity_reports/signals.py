@@ -0,0 +1,49 @@
+"""
+Signal handlers for openedx-proversity-reports.
+"""
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from openedx_proversity_reports.edxapp_wrapper.get_completion_models import get_block_completion_model
+from openedx_proversity_reports.models import UserSessionMetrics
+from openedx_proversity_reports.tasks import (
+    LEARNER_COMPLETION_SUMMARY_UPDATE_CACHE_KEY,
+    update_learner_completion_summary_task,
+)
+
+
+@receiver(user_logged_in)
+def update_user_last_login(sender, request, user, **kwargs):  # pylint: disable=unused-argument
+    """
+    Copy the last login date of the user to the session metrics.
+    """
+    UserSessionMetrics.update_last_login(user.id, user.last_login or timezone.now())
+
+
+@receiver(post_save, sender=get_block_completion_model())
+def schedule_learner_completion_summary_update(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Schedule the update of the completion summary of the learner after a block completion save.
+
+    The update runs in a deferred task once the transaction is committed, so the save doesn't
+    make any extra query. The saves of the same learner and course during
+    OPR_COMPLETION_SUMMARY_UPDATE_DELAY seconds are summarized by a single task.
+    """
+    user_id = instance.user_id
+    course_id = unicode(instance.course_key)
+
+    def schedule_update():
+        """
+        Start the update task unless it's already scheduled for the learner and course.
+        """
+        delay = getattr(settings, 'OPR_COMPLETION_SUMMARY_UPDATE_DELAY', 60)
+
+        if cache.add(LEARNER_COMPLETION_SUMMARY_UPDATE_CACHE_KEY.format(user_id, course_id), True, delay * 2):
+            update_learner_completion_summary_task.apply_async(args=(user_id, course_id), countdown=delay)
+
+    transaction.on_commit(schedule_update)
@@ -2,12 +2,16 @@
 Task for Openedx Proversity Report plugin.
 """
 import json
+import logging
 from datetime import datetime
 
 from celery import task
 from celery.exceptions import InvalidTaskError
 from celery.states import FAILURE
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 from rest_framework import status
@@ -15,31 +19,57 @@ from rest_framework import status
 from openedx_proversity_reports.edxapp_wrapper.get_course_content import course_overview
 from openedx_proversity_reports.reports.activity_completion_report import GenerateCompletionReport
 from openedx_proversity_reports.reports.backend.enrollment_per_site_report import generate_enrollment_per_site_report
-from openedx_proversity_reports.reports.enrollment_report import EnrollmentReport
+from openedx_proversity_reports.reports.enrollment_report import generate_enrollment_report_data
 from openedx_proversity_reports.reports.last_page_accessed import (
     get_exit_count_data,
     get_last_page_accessed_data,
 )
 from openedx_proversity_reports.reports.learning_tracker_report import LearningTrackerReport
-from openedx_proversity_reports.reports.last_login_report import LastLoginReport
+from openedx_proversity_reports.reports.last_login_report import iter_last_login_data
 from openedx_proversity_reports.reports.time_spent_report import get_time_spent_report_data
 from openedx_proversity_reports.reports.time_spent_report_per_user import GenerateTimeSpentPerUserReport
-from openedx_proversity_reports.serializers import ActivityCompletionReportSerializer
+from openedx_proversity_reports.serializers import (
+    ActivityCompletionReportSerializer,
+    DeltaReportSerializer,
+    LearningTrackerReportSerializer,
+)
 from openedx_proversity_reports.utils import (
+    encoded_report_result,
+    filter_users_with_completions_since,
     generate_report_as_list,
+    generate_report_as_normalized,
     get_enrolled_users,
+    get_normalized_course_id,
     get_root_block,
+    get_users_by_username,
+    update_learner_completion_summaries,
 )
 
 BLOCK_DEFAULT_REPORT_FILTER = ['vertical']
+logger = logging.getLogger(__name__)
+LEARNER_COMPLETION_SUMMARY_UPDATE_CACHE_KEY = 'openedx-proversity-reports-completion-summary-update-{}-{}'
+REPORT_FORMATS = {
+    'normalized': generate_report_as_normalized,
+}
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_completion_report(courses, *args, **kwargs):
     """
     Return the completion data for the given courses
+
+    Args:
+        courses: Course ids list.
+        block_report_filter: List of block types to retrieve. **Optional**
+        since: Only return the users with completions modified after this date. **Optional**
+        format: 'normalized' to return the block table of the course once and the indexes
+                of the completed blocks for every user. **Optional**
     """
     block_report_filter = kwargs.get('block_report_filter', BLOCK_DEFAULT_REPORT_FILTER)
+    generate_report_data = REPORT_FORMATS.get(kwargs.get('format'), generate_report_as_list)
+    since = get_report_since(**kwargs)
+    watermark = timezone.now()
     data = {}
 
     for course_id in courses:
@@ -56,18 +86,22 @@ def generate_completion_report(courses, *args, **kwargs):
             is_staff=0,
         )
 
+        if since:
+            enrolled_users = filter_users_with_completions_since(enrolled_users, course_key, since)
+
         if not enrolled_users:
-            break
+            continue
 
         block_root = get_root_block(enrolled_users.first(), course_key)
-        course_data = generate_report_as_list(enrolled_users, course_key, block_report_filter, block_root)
+        course_data = generate_report_data(enrolled_users, course_key, block_report_filter, block_root)
 
         data[course_id] = course_data
 
-    return data
+    return get_delta_report_data(data, since, watermark, **kwargs)
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_last_page_accessed_report(courses, *args, **kwargs):
     """
     Return the last page accessed data for the given courses.
@@ -75,21 +109,29 @@ def generate_last_page_accessed_report(courses, *args, **kwargs):
     The dictionary contains 'last_page_data' that contains information about the last problem
     or html or video, etc, that user has accessed.
     exit_count_data holds information about all units in the course and the count of how many users are in each unit.
+
+    If since is provided, only the users with completions modified after that date are returned
+    and exit_count_data is not calculated, since it requires the data of all the users.
     """
     report_data = {
         'last_page_data': {},
         'exit_count_data': {},
     }
+    since = get_report_since(**kwargs)
+    watermark = timezone.now()
 
-    last_page_data = get_last_page_accessed_data(courses)
+    last_page_data = get_last_page_accessed_data(courses, since=since)
     if last_page_data:
         report_data['last_page_data'] = last_page_data
-        report_data['exit_count_data'] = get_exit_count_data(last_page_data, courses)
 
-    return report_data
+        if not since:
+            report_data['exit_count_data'] = get_exit_count_data(last_page_data, courses)
+
+    return get_delta_report_data(report_data, since, watermark, **kwargs)
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_time_spent_report(courses, *args, **kwargs):
     """
     Return the time spent data for the given courses.
@@ -107,20 +149,26 @@ def generate_time_spent_report(courses, *args, **kwargs):
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_learning_tracker_report(courses, *args, **kwargs):
     """
     Return the time spent data for the given courses.
 
     Args:
         courses: Course ids list.
+        persisted_only: Calculate the grade metrics from the persisted grades of the course. **Optional**
     Returns:
         Dict with the data for every course.
     """
     data = {}
+    report_options = get_learning_tracker_options(kwargs)
 
     for course in courses:
         try:
-            data[course] = LearningTrackerReport(course).generate_report()
+            data[course] = LearningTrackerReport(
+                course,
+                persisted_only=report_options.get('persisted_only', False),
+            ).generate_report()
         except InvalidKeyError:
             continue
 
@@ -128,50 +176,49 @@ def generate_learning_tracker_report(courses, *args, **kwargs):
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_enrollment_report(courses, *args, **kwargs):
     """
     Return the enrollment data for the given courses.
 
     Args:
         courses: Course ids list.
+        since: Only return the enrollments created or changed after this date. **Optional**
     Returns:
         Dict with the enrollment data for every course.
     """
-    data = {}
+    since = get_report_since(**kwargs)
+    watermark = timezone.now()
+    course_ids = {}
 
     for course in courses:
         try:
-            data[course] = EnrollmentReport(course).generate_report(**kwargs)
+            course_ids[CourseKey.from_string(course)] = course
         except InvalidKeyError:
             continue
 
-    return data
+    report_data = generate_enrollment_report_data(list(course_ids), **dict(kwargs, since=since))
+
+    return get_delta_report_data(
+        {course_id: report_data.get(course_key, []) for course_key, course_id in course_ids.items()},
+        since,
+        watermark,
+        **kwargs
+    )
 
 
 @task(default_retry_delay=5, max_retries=5)
+@encoded_report_result
 def generate_activity_completion_report(courses, *args, **kwargs):
     """
     Returns the activity completion report.
+
+    If since is provided, only the users with completions modified after that date are returned.
     """
     data = {}
-    serialized_data = ActivityCompletionReportSerializer(data=kwargs)
-
-    if not serialized_data.is_valid():
-        # Raises the error containing the JsonResponse parameters
-        # to be used in the view.
-        raise InvalidTaskError(
-            json.dumps({
-                'data': {
-                    'status': FAILURE,
-                    'result': serialized_data.errors,
-                },
-                'status': status.HTTP_400_BAD_REQUEST,
-            })
-        )
-
-    required_block_ids = serialized_data.data.get('required_activity_ids', [])
-    block_types = serialized_data.data.get('block_types', [])
-    passing_score = serialized_data.data.get('passing_score', [])
+    since = get_report_since(**kwargs)
+    watermark = timezone.now()
+    required_block_ids, block_types, passing_score = get_activity_completion_options(kwargs)
 
     for course_id in courses:
         try:
@@ -179,9 +226,13 @@ def generate_activity_completion_report(courses, *args, **kwargs):
         except InvalidKeyError:
             continue
 
-        course_key = CourseKey.from_string(course_id)
+        enrolled_users = get_enrolled_users(course_key)
+
+        if since:
+            enrolled_users = filter_users_with_completions_since(enrolled_users, course_key, since)
+
         completion_report = GenerateCompletionReport(
-            get_enrolled_users(course_key),
+            enrolled_users,
             course_key,
             required_block_ids,
             block_types,
@@ -189,10 +240,11 @@ def generate_activity_completion_report(courses, *args, **kwargs):
         )
         data[course_id] = completion_report.generate_report_data()
 
-    return data
+    return get_delta_report_data(data, since, watermark, **kwargs)
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_time_spent_per_user_report(courses, *args, **kwargs):
     """
     Returns the time spent per user data for the given courses.
@@ -200,6 +252,8 @@ def generate_time_spent_per_user_report(courses, *args, **kwargs):
     Args:
         courses: Course ids list.
         date: Date string for querying in Google BigQuery. Date format: '%Y-%m-%d' e.g. '2019-01-01'
+        format: 'matrix' to return the verticals and users once with a users x verticals time matrix. **Optional**
+        matrix_encoding: 'base64' to return the matrix as packed float32 values. **Optional**
     Returns:
         Dict with 'time_spent_per_user_data' containing time spent per user report data.
     """
@@ -230,12 +284,13 @@ def generate_time_spent_per_user_report(courses, *args, **kwargs):
             course_key=course_key,
             query_date=date_field.strftime(date_format),
         )
-        report_data[course_id] = time_spent_per_user_report.generate_report_data()
+        report_data[course_id] = get_time_spent_per_user_report_data(time_spent_per_user_report, kwargs)
 
     return report_data
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def enrollment_per_site_report_task(*args, **kwargs):
     """
     Generate the enrollemt per site report.
@@ -272,21 +327,327 @@ def enrollment_per_site_report_task(*args, **kwargs):
 
 
 @task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
 def generate_last_login_report(courses, *args, **kwargs):
     """
     Return the last login data for the given courses.
 
     Args:
         courses: Course ids list.
+        since: Only return the users that have logged in after this date. **Optional**
     Returns:
         Dict with the last login data for each course.
     """
+    since = get_report_since(**kwargs)
+    watermark = timezone.now()
     data = {}
+    course_ids = {}
 
     for course in courses:
         try:
-            data[course] = LastLoginReport(course).generate_report_data(**kwargs)
+            course_ids[CourseKey.from_string(course)] = course
+            data[course] = []
         except InvalidKeyError:
             data[course] = ['Invalid course id value.']
 
-    return data
+    requested_course_ids = {get_normalized_course_id(course_key): course for course_key, course in course_ids.items()}
+
+    for course_key, user_data in iter_last_login_data(list(course_ids), **dict(kwargs, since=since)):
+        course = requested_course_ids.get(get_normalized_course_id(course_key))
+
+        if course is None:
+            logger.warning('The last login row of the course %s does not match the requested courses.', course_key)
+            continue
+
+        data[course].append(user_data)
+
+    return get_delta_report_data(data, since, watermark, **kwargs)
+
+
+@task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
+def completion_report_task(*args, **kwargs):
+    """
+    Generate a page of the completion report.
+
+    kwargs:
+        course_key: Course id string.
+        enrolled_users: List of the enrolled users of the page.
+        extra_data: Contains extra data passed from the report backend.
+    Returns:
+        Dict: {
+            course_key: Course id string.
+            data: Completion data of the page users.
+        }
+    """
+    extra_data = kwargs.pop('extra_data', {})
+    course_key = CourseKey.from_string(kwargs.get('course_key', ''))
+    users = get_page_users(kwargs.pop('enrolled_users', []))
+    report_data = []
+
+    if users:
+        report_data = generate_report_as_list(
+            users,
+            course_key,
+            extra_data.get('block_report_filter', BLOCK_DEFAULT_REPORT_FILTER),
+            get_root_block(users.first(), course_key),
+        )
+
+    return {
+        'course_key': kwargs.get('course_key', ''),
+        'data': report_data,
+    }
+
+
+@task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
+def learning_tracker_report_task(*args, **kwargs):
+    """
+    Generate a page of the learning tracker report.
+
+    kwargs:
+        course_key: Course id string.
+        enrolled_users: List of the enrolled users of the page.
+        extra_data: Contains extra data passed from the report backend.
+    Returns:
+        Dict: {
+            course_key: Course id string.
+            data: Learning tracker data of the page users.
+        }
+    """
+    report_options = get_learning_tracker_options(kwargs.pop('extra_data', {}))
+    report_data = LearningTrackerReport(
+        kwargs.get('course_key', ''),
+        persisted_only=report_options.get('persisted_only', False),
+        users=get_page_users(kwargs.pop('enrolled_users', [])),
+    ).generate_report()
+
+    return {
+        'course_key': kwargs.get('course_key', ''),
+        'data': report_data,
+    }
+
+
+@task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
+def time_spent_per_user_report_task(*args, **kwargs):
+    """
+    Generate a page of the time spent per user report.
+
+    kwargs:
+        course_key: Course id string.
+        enrolled_users: List of the enrolled users of the page.
+        extra_data: Contains extra data passed from the report backend.
+    Returns:
+        Dict: {
+            course_key: Course id string.
+            data: Time spent data of the page users.
+        }
+    """
+    extra_data = kwargs.pop('extra_data', {})
+    time_spent_per_user_report = GenerateTimeSpentPerUserReport(
+        users=get_page_users(kwargs.pop('enrolled_users', [])),
+        course_key=CourseKey.from_string(kwargs.get('course_key', '')),
+        query_date=extra_data.get('date', ''),
+        filter_by_users=True,
+    )
+
+    return {
+        'course_key': kwargs.get('course_key', ''),
+        'data': get_time_spent_per_user_report_data(time_spent_per_user_report, extra_data),
+    }
+
+
+@task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+@encoded_report_result
+def activity_completion_report_task(*args, **kwargs):
+    """
+    Generate a page of the activity completion report.
+
+    kwargs:
+        course_key: Course id string.
+        enrolled_users: List of the enrolled users of the page.
+        extra_data: Contains extra data passed from the report backend.
+    Returns:
+        Dict: {
+            course_key: Course id string.
+            data: Activity completion data of the page users.
+        }
+    """
+    required_block_ids, block_types, passing_score = get_activity_completion_options(kwargs.pop('extra_data', {}))
+    completion_report = GenerateCompletionReport(
+        get_page_users(kwargs.pop('enrolled_users', [])),
+        CourseKey.from_string(kwargs.get('course_key', '')),
+        required_block_ids,
+        block_types,
+        passing_score,
+    )
+
+    return {
+        'course_key': kwargs.get('course_key', ''),
+        'data': completion_report.generate_report_data(),
+    }
+
+
+@task(default_retry_delay=5, max_retries=5)  # pylint: disable=not-callable
+def update_learner_completion_summary_task(user_id, course_id):
+    """
+    Rebuild the completion summary of a learner after their block completions were saved.
+
+    Args:
+        user_id: Id of the user.
+        course_id: Course id string.
+    """
+    # New block completion saves schedule a new update from now on.
+    cache.delete(LEARNER_COMPLETION_SUMMARY_UPDATE_CACHE_KEY.format(user_id, course_id))
+
+    try:
+        update_learner_completion_summaries(CourseKey.from_string(course_id), [user_id])
+    except IntegrityError as error:
+        # The summary was created by a concurrent update.
+        update_learner_completion_summary_task.retry(exc=error)
+
+
+def get_time_spent_per_user_report_data(time_spent_per_user_report, report_options):
+    """
+    Return the time spent per user data in the requested format.
+
+    Args:
+        time_spent_per_user_report: GenerateTimeSpentPerUserReport instance.
+        report_options: Dict with the optional format and matrix_encoding values.
+    Returns:
+        List with the data of every user or the report matrix.
+    """
+    if report_options.get('format') == 'matrix':
+        return time_spent_per_user_report.generate_report_matrix(
+            encoding=report_options.get('matrix_encoding'),
+        )
+
+    return time_spent_per_user_report.generate_report_data()
+
+
+def get_learning_tracker_options(data):
+    """
+    Return the validated options of the learning tracker report.
+
+    Args:
+        data: Dict with the persisted_only value.
+    Returns:
+        Dict with the validated options.
+    Raises:
+        InvalidTaskError: If the options are invalid, containing the JsonResponse parameters
+                          to be used in the view.
+    """
+    serialized_data = LearningTrackerReportSerializer(data=data)
+
+    if not serialized_data.is_valid():
+        raise InvalidTaskError(
+            json.dumps({
+                'data': {
+                    'status': FAILURE,
+                    'result': serialized_data.errors,
+                },
+                'status': status.HTTP_400_BAD_REQUEST,
+            })
+        )
+
+    return serialized_data.validated_data
+
+
+def get_activity_completion_options(data):
+    """
+    Return the validated options of the activity completion report.
+
+    Args:
+        data: Dict with the required_activity_ids, block_types and passing_score values.
+    Returns:
+        Tuple: (required block ids, block types, passing score)
+    Raises:
+        InvalidTaskError: If the options are invalid, containing the JsonResponse parameters
+                          to be used in the view.
+    """
+    serialized_data = ActivityCompletionReportSerializer(data=data)
+
+    if not serialized_data.is_valid():
+        raise InvalidTaskError(
+            json.dumps({
+                'data': {
+                    'status': FAILURE,
+                    'result': serialized_data.errors,
+                },
+                'status': status.HTTP_400_BAD_REQUEST,
+            })
+        )
+
+    return (
+        serialized_data.validated_data.get('required_activity_ids', []),
+        serialized_data.validated_data.get('block_types', []),
+        serialized_data.validated_data.get('passing_score', 0),
+    )
+
+
+def get_page_users(enrolled_users):
+    """
+    Return the users of a report page.
+
+    Args:
+        enrolled_users: List of the serialized users passed from the report backend.
+    Returns:
+        Queryset of Users.
+    """
+    return get_users_by_username([user.get('username', '') for user in enrolled_users])
+
+
+def get_report_since(**kwargs):
+    """
+    Return the since date of the delta mode reports or None if it was not provided.
+
+    Raises:
+        InvalidTaskError: If since has an invalid format.
+    """
+    serialized_data = DeltaReportSerializer(data=kwargs)
+
+    if not serialized_data.is_valid():
+        raise InvalidTaskError(
+            json.dumps({
+                'data': {
+                    'status': FAILURE,
+                    'result': serialized_data.errors,
+                },
+                'status': status.HTTP_400_BAD_REQUEST,
+            })
+        )
+
+    return serialized_data.validated_data.get('since')
+
+
+def get_delta_report_data(report_data, since, watermark, **kwargs):
+    """
+    Return the report data with the watermark to be used as since value in the next report request.
+
+    The full reports return the raw report data, unless include_watermark is requested
+    to start requesting the changes after them.
+
+    Args:
+        report_data: Report data.
+        since: Requested since date or None.
+        watermark: Date when the report generation started.
+        kwargs: Report parameters, containing the optional include_watermark value.
+    Returns:
+        The report data for full reports without include_watermark, otherwise
+        Dict: {
+            since: Requested since date or None for full reports.
+            watermark: Since value for the next request.
+            data: Report data.
+        }
+    """
+    serialized_data = DeltaReportSerializer(data=kwargs)
+
+    if not (since or serialized_data.is_valid() and serialized_data.validated_data.get('include_watermark')):
+        return report_data
+
+    return {
+        'since': since.isoformat() if since else None,
+        'watermark': watermark.isoformat(),
+        'data': report_data,
+    }
@@ -3,12 +3,19 @@
 """
 Utils file for Openedx Proversity Reports.
 """
+import base64
 import copy
+import json
 import logging
+import zlib
+from functools import wraps
 from importlib import import_module
+from itertools import islice
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 
 from openedx_proversity_reports.edxapp_wrapper.get_completion_models import get_block_completion_model
 from openedx_proversity_reports.edxapp_wrapper.get_course_blocks import get_course_blocks
@@ -17,26 +24,111 @@ from openedx_proversity_reports.edxapp_wrapper.get_course_teams import get_cours
 from openedx_proversity_reports.edxapp_wrapper.get_modulestore import get_modulestore
 from openedx_proversity_reports.edxapp_wrapper.get_student_library import course_access_role, get_course_enrollment
 from openedx_proversity_reports.edxapp_wrapper.get_supported_fields import get_supported_fields
+from openedx_proversity_reports.models import LearnerCompletionSummary
 
 logger = logging.getLogger(__name__)
 
+RESULT_CODEC_KEY = 'opr_result_codec'
+RESULT_PAYLOAD_KEY = 'opr_result_payload'
+ZLIB_JSON_RESULT_CODEC = 'zlib-json'
+
 
 def generate_report_as_list(users, course_key, block_report_filter, root_block):
     """
     Returns a list with the user information for every block in block_report_filter.
     """
+    data = []
+    users_completions, latest_block_keys = get_users_completions(users, course_key)
+
+    for user in users:
+        block_data = copy.deepcopy(root_block)
+        mark_blocks_completed(block_data, users_completions.get(user.id, {}), latest_block_keys.get(user.id))
+        user_data = get_report_user_data(user, course_key)
+
+        for block, block_row in get_report_block_rows(block_data, block_report_filter):
+            block_row['complete'] = block.get('complete')
+            user_data.setdefault(block.get('type'), []).append(block_row)
+
+        data.append(user_data)
+
+    return data
+
+
+def generate_report_as_normalized(users, course_key, block_report_filter, root_block):
+    """
+    Returns the block table of the course and the completed blocks of every user.
+
+    The block information is returned once, and the completion of every user
+    is a list with the indexes of the completed blocks in the block table.
+
+    Returns:
+        Dict: {
+            blocks: Dict containing the list of blocks by block type.
+            users: List of dicts with the user information and the completed block indexes by block type.
+        }
+    """
+    blocks = {}
+
+    for block, block_row in get_report_block_rows(root_block, block_report_filter):
+        blocks.setdefault(block.get('type'), []).append(block_row)
+
+    data = []
+    users_completions, latest_block_keys = get_users_completions(users, course_key)
+
+    for user in users:
+        block_data = copy.deepcopy(root_block)
+        mark_blocks_completed(block_data, users_completions.get(user.id, {}), latest_block_keys.get(user.id))
+        user_data = get_report_user_data(user, course_key)
+        block_indexes = {}
+        completed_blocks = {block_type: [] for block_type in blocks}
+
+        for block, _ in get_report_block_rows(block_data, block_report_filter):
+            block_type = block.get('type')
+            block_index = block_indexes.get(block_type, 0)
+            block_indexes[block_type] = block_index + 1
+
+            if block.get('complete'):
+                completed_blocks[block_type].append(block_index)
+
+        user_data['completed'] = completed_blocks
+        data.append(user_data)
+
+    return {
+        'blocks': blocks,
+        'users': data,
+    }
+
+
+def get_report_user_data(user, course_key):
+    """
+    Returns the user information included in the completion report.
+    """
+    cohort = get_course_cohort(user=user, course_key=course_key)
+    user_teams = get_course_teams(membership__user=user, course_id=course_key)
+
+    return dict(
+        username=user.username,
+        user_id=user.id,
+        cohort=cohort.name if cohort else '',
+        team=user_teams[0].name if user_teams else '',
+    )
+
 
-    def update_user_dict(child, user_data, section=None, subsection=None, vertical=None):
+def get_report_block_rows(root_block, block_report_filter):
+    """
+    Returns a list of (block, block data) tuples for every block in block_report_filter,
+    in course order.
+    """
+    block_rows = []
+
+    def add_block_row(child, section=None, subsection=None, vertical=None):
         """
-        Returns the complete data for the given values.
+        Adds the data for the given values.
         """
         if child.get('type') in block_report_filter:
 
-            type_data = user_data.get(child.get('type'), [])
-
             child_data = dict(
                 name=child.get('display_name'),
-                complete=child.get('complete'),
                 number=child.get('position_number'),
             )
 
@@ -52,37 +144,18 @@ def generate_report_as_list(users, course_key, block_report_filter, root_block):
                 child_data['vertical_name'] = vertical.get('display_name')
                 child_data['vertical_number'] = vertical.get('position_number')
 
-            type_data.append(child_data)
+            block_rows.append((child, child_data))
 
-            user_data[child.get('type')] = type_data
+    for section in root_block.get('children', []):
+        add_block_row(section)
+        for subsection in section.get('children', []):
+            add_block_row(subsection, section)
+            for vertical in subsection.get('children', []):
+                add_block_row(vertical, section, subsection)
+                for component in vertical.get('children', []):
+                    add_block_row(component, section, subsection, vertical)
 
-    data = []
-    for user in users:
-        block_data = copy.deepcopy(root_block)
-        mark_blocks_completed(block_data, user, course_key)
-        sections = block_data.get('children', [])
-        cohort = get_course_cohort(user=user, course_key=course_key)
-        user_teams = get_course_teams(membership__user=user, course_id=course_key)
-
-        user_data = dict(
-            username=user.username,
-            user_id=user.id,
-            cohort=cohort.name if cohort else '',
-            team=user_teams[0].name if user_teams else '',
-        )
-
-        for section in sections:
-            update_user_dict(section, user_data)
-            for subsection in section.get('children', []):
-                update_user_dict(subsection, user_data, section)
-                for vertical in subsection.get('children', []):
-                    update_user_dict(vertical, user_data, section, subsection)
-                    for component in vertical.get('children', []):
-                        update_user_dict(component, user_data, section, subsection, vertical)
-
-        data.append(user_data)
-
-    return data
+    return block_rows
 
 
 def get_root_block(user, course_key):
@@ -176,22 +249,65 @@ def get_root_block(user, course_key):
     return root_block
 
 
-def mark_blocks_completed(block, user, course_key):
+def get_users_completions(users, course_key):
+    """
+    Return the block completions and the latest completed block of the given users.
+
+    The block completions are read with chunked queries for all the users and the latest
+    completed block is read from the learner completion summaries.
+
+    Args:
+        users: Iterable of Users.
+        course_key: opaque_keys.edx.keys.CourseKey.
+    Returns:
+        Tuple: (
+            Dict containing the completion value by block key of every user id,
+            Dict containing the latest completed block key of every user id,
+        )
+    """
+    users_completions = {}
+    latest_block_keys = {}
+
+    for user_ids in get_chunks(user.id for user in users):
+        block_completions = get_block_completion_model().objects.filter(
+            course_key=course_key,
+            user_id__in=user_ids,
+        ).values_list('user_id', 'block_key', 'completion')
+
+        for user_id, block_key, completion in block_completions:
+            users_completions.setdefault(user_id, {})[block_key.map_into_course(course_key)] = completion
+
+        completion_summaries = LearnerCompletionSummary.objects.filter(
+            course_key=course_key,
+            user_id__in=user_ids,
+            latest_block_key__isnull=False,
+        ).values_list('user_id', 'latest_block_key')
+
+        for user_id, latest_block_key in completion_summaries:
+            latest_block_keys[user_id] = latest_block_key.map_into_course(course_key)
+
+    return users_completions, latest_block_keys
+
+
+def mark_blocks_completed(block, course_block_completions, latest_block_key):
     """
     Walk course tree, marking block completion.
     Mark 'most recent completed block as 'resume_block'
-    """
-    last_completed_child_position = get_block_completion_model().get_latest_block_completed(user, course_key)
 
-    if last_completed_child_position:
+    Args:
+        block: Root block dict returned by get_root_block.
+        course_block_completions: Dict containing the completion value by block key of the user.
+        latest_block_key: Block key of the latest completed block of the user or None.
+    """
+    if latest_block_key:
         recurse_mark_complete(
-            course_block_completions=get_block_completion_model().get_course_completions(user, course_key),
-            latest_completion=last_completed_child_position,
+            course_block_completions=course_block_completions,
+            latest_block_key=latest_block_key,
             block=block
         )
 
 
-def recurse_mark_complete(course_block_completions, latest_completion, block):
+def recurse_mark_complete(course_block_completions, latest_block_key, block):
     """
     Helper function to walk course tree dict,
     marking blocks as 'complete' and 'last_complete'
@@ -203,14 +319,14 @@ def recurse_mark_complete(course_block_completions, latest_completion, block):
 
     if course_block_completions.get(block_key):
         block['complete'] = True
-        if block_key == latest_completion.block_key:
+        if block_key == latest_block_key:
             block['resume_block'] = True
 
     if block.get('children'):
         for idx in range(len(block['children'])):
             recurse_mark_complete(
                 course_block_completions,
-                latest_completion,
+                latest_block_key,
                 block=block['children'][idx]
             )
             if block['children'][idx]['resume_block'] is True:
@@ -286,6 +402,37 @@ def get_enrolled_users(course_key, include_staff_users=False):
         )
 
 
+def get_users_by_username(usernames):
+    """
+    Return the users for the given usernames with a single query.
+
+    Args:
+        usernames: List of usernames.
+    Returns:
+        Queryset of Users.
+    """
+    return User.objects.filter(username__in=usernames)
+
+
+def filter_users_with_completions_since(users, course_key, since):
+    """
+    Return only the users that have block completions modified after the given date.
+
+    Args:
+        users: Queryset of Users.
+        course_key: opaque_keys.edx.keys.CourseKey.
+        since: Datetime of the last report generation.
+    Returns:
+        Queryset of Users.
+    """
+    return users.filter(
+        id__in=get_block_completion_model().objects.filter(
+            course_key=course_key,
+            modified__gt=since,
+        ).values('user_id'),
+    )
+
+
 def get_attribute_from_module(module, attribute_name):
     """
     Return the attribute for the given module path and attribute name.
@@ -305,20 +452,24 @@ def get_exisiting_users_by_email(user_email_list):
     Return a list of django.contrib.auth.models.User instances of users
     that exists in the platform.
 
+    The users are fetched with chunked email__in queries and returned
+    in the same order of the given emails.
+
     Args:
         user_email_list: List containing the emails of the users.
     Returns:
         exisiting_user_list: List containing django.contrib.auth.models.User instances.
     """
-    exisiting_user_list = []
+    users_by_email = {}
 
-    for user_email in user_email_list:
-        try:
-            exisiting_user_list.append(User.objects.get(email=user_email))
-        except User.DoesNotExist:
-            continue
+    for user_emails in get_chunks(set(user_email_list)):
+        for user in User.objects.filter(email__in=user_emails):
+            users_by_email[user.email.lower()] = user
 
-    return exisiting_user_list
+    return [
+        users_by_email[user_email.lower()] for user_email in user_email_list
+        if user_email.lower() in users_by_email
+    ]
 
 
 def get_user_course_enrollments(user):
@@ -401,3 +552,133 @@ def get_report_backend(requested_report_name):
         report_backend = None
 
     return report_backend, report_backend_settings
+
+
+def get_normalized_course_id(course_key):
+    """
+    Return the course id string used to match the course keys read from the database.
+
+    The database may return the course ids with a different case than the requested
+    course keys, e.g. the MySQL IN lookups are case insensitive.
+
+    Args:
+        course_key: opaque_keys.edx.keys.CourseKey instance or course id string.
+    Returns:
+        Lowercase course id string.
+    """
+    return unicode(course_key).lower()
+
+
+def get_chunks(iterable, chunk_size=None):
+    """
+    Yield lists with the items of the given iterable in groups of chunk_size items.
+
+    Args:
+        iterable: Any iterable e.g. a queryset iterator.
+        chunk_size: Max number of items per chunk. Defaults to OPR_QUERY_CHUNK_SIZE.
+    Yields:
+        List containing at most chunk_size items.
+    """
+    chunk_size = chunk_size or getattr(settings, 'OPR_QUERY_CHUNK_SIZE', 1000)
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, chunk_size))
+
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def encode_report_result(result):
+    """
+    Return the report result encoded with the OPR_REPORT_RESULT_CODEC codec.
+
+    Args:
+        result: Report task result.
+    Returns:
+        The result without changes if no codec is configured, otherwise:
+        Dict: {
+            opr_result_codec: Codec name.
+            opr_result_payload: Base64 string of the encoded result.
+        }
+    """
+    codec = getattr(settings, 'OPR_REPORT_RESULT_CODEC', None)
+
+    if codec != ZLIB_JSON_RESULT_CODEC:
+        return result
+
+    return {
+        RESULT_CODEC_KEY: codec,
+        RESULT_PAYLOAD_KEY: base64.b64encode(zlib.compress(json.dumps(result, cls=DjangoJSONEncoder))),
+    }
+
+
+def decode_report_result(result):
+    """
+    Return the report result decoded if it was encoded by encode_report_result.
+
+    Args:
+        result: Report task result.
+    Returns:
+        The decoded result.
+    """
+    if not (isinstance(result, dict) and result.get(RESULT_CODEC_KEY) == ZLIB_JSON_RESULT_CODEC):
+        return result
+
+    return json.loads(zlib.decompress(base64.b64decode(result.get(RESULT_PAYLOAD_KEY, ''))))
+
+
+def encoded_report_result(report_function):
+    """
+    Decorator that encodes the result of the report tasks with encode_report_result.
+    """
+    @wraps(report_function)
+    def wrapper(*args, **kwargs):
+        """
+        Return the encoded report result.
+        """
+        return encode_report_result(report_function(*args, **kwargs))
+
+    return wrapper
+
+
+def update_learner_completion_summaries(course_key, user_ids=None):
+    """
+    Rebuild the learner completion summaries of the given course from the block completions.
+
+    Args:
+        course_key: opaque_keys.edx.keys.CourseKey instance.
+        user_ids: List of the user ids to rebuild, all the learners of the course by default.
+    Returns:
+        Number of summaries created.
+    """
+    course_completions = get_block_completion_model().objects.filter(course_key=course_key)
+    course_summaries = LearnerCompletionSummary.objects.filter(course_key=course_key)
+
+    if user_ids is not None:
+        course_completions = course_completions.filter(user_id__in=user_ids)
+        course_summaries = course_summaries.filter(user_id__in=user_ids)
+
+    summaries = {}
+    latest_completions = course_completions.order_by(
+        'user_id',
+        '-modified',
+    ).values_list('user_id', 'block_key', 'modified')
+
+    # The completions of every user are ordered by date, so the first one is the latest.
+    for user_id, block_key, modified in latest_completions.iterator():
+        if user_id not in summaries:
+            summaries[user_id] = LearnerCompletionSummary(
+                user_id=user_id,
+                course_key=course_key,
+                latest_block_key=block_key,
+                latest_completion=modified,
+            )
+
+    with transaction.atomic():
+        course_summaries.delete()
+        LearnerCompletionSummary.objects.bulk_create(
+            summaries.values(),
+            batch_size=getattr(settings, 'OPR_QUERY_CHUNK_SIZE', 1000),
+        )
+
+    return len(summaries)